@@ -6,14 +6,22 @@ This module exposes a single public function:
 
     get_engine(db_type, database=None)
 
+plus get_async_engine(db_type, database=None) for asyncio callers.
+
 - db_type: 'mysql' or 'mariadb'
 - database: optional database name override
 
 It reads credentials from the project's .env file, which is expected
 to be located in the project root (one level above this 'database' package).
+
+Engines are cached per (db_type, database), so repeated calls (e.g. from
+DatabaseManager.switch_database) reuse the same connection pool.
+Long-lived owners use acquire_engine/release_engine so a pool is only
+disposed once nobody references it anymore.
 """
 
 import os
+import threading
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -33,10 +41,96 @@ else:
     load_dotenv()
 
 
+# --- Pool configuration --------------------------------------------------------
+
+# Sized for concurrent text2sql evaluation (several workers per RDBMS).
+POOL_DEFAULTS = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    "pool_timeout": 30,
+    "pool_recycle": 1800,
+}
+
+# Per-connection driver settings (see _connect_args); timeouts in seconds,
+# overridable with DB_READ_TIMEOUT / DB_WRITE_TIMEOUT
+CONNECT_DEFAULTS = {
+    "charset": "utf8mb4",
+    "read_timeout": 60,
+    "write_timeout": 60,
+}
+
+# Evaluation is read-heavy; skips repeatable-read snapshot bookkeeping
+ISOLATION_LEVEL = "READ COMMITTED"
+
+# One engine (and therefore one pool) per (db_type, database)
+_ENGINE_CACHE: dict = {}
+# Number of owners (e.g. DatabaseManager instances) holding each cached engine
+_ENGINE_REFS: dict = {}
+_ENGINE_LOCK = threading.Lock()
+
+# DBAPI drivers for the mysql dialect (env DB_DRIVER); mysqldb is the
+# mysqlclient C extension, noticeably faster at decoding large result sets
+SUPPORTED_DRIVERS = ("pymysql", "mysqldb")
+# Async drivers (env DB_ASYNC_DRIVER) for get_async_engine
+SUPPORTED_ASYNC_DRIVERS = ("asyncmy", "aiomysql")
+
+# Async engines, cached like the sync ones but never shared with them
+_ASYNC_ENGINE_CACHE: dict = {}
+
+
 # --- Internal helpers ----------------------------------------------------------
 
 
-def _build_mysql_url(database: str | None) -> str:
+def _env_prefix(db_type: str) -> str:
+    return "MYSQL" if db_type == "mysql" else "MARIADB"
+
+
+def _pool_option(db_type: str, name: str, value: int | None) -> int:
+    """Resolve a pool option: explicit arg > env (e.g. MYSQL_POOL_SIZE) > default."""
+    if value is not None:
+        return value
+    env_value = os.getenv(f"{_env_prefix(db_type)}_{name.upper()}")
+    if env_value:
+        return int(env_value)
+    return POOL_DEFAULTS[name]
+
+
+def _pre_ping_option(value: bool | None) -> bool:
+    """Resolve pool_pre_ping: explicit arg > env DB_POOL_PRE_PING > False."""
+    if value is not None:
+        return value
+    flag = os.getenv("DB_POOL_PRE_PING", "").strip().lower()
+    return flag in ("1", "true", "yes", "on")
+
+
+def _driver(env_var: str = "DB_DRIVER", supported=SUPPORTED_DRIVERS) -> str:
+    """Resolve the DBAPI driver from env (default: first supported driver)."""
+    driver = os.getenv(env_var, "").strip().lower() or supported[0]
+    if driver not in supported:
+        raise ValueError(f"Unsupported {env_var}: {driver!r}. Use one of {supported}.")
+    return driver
+
+
+def _connect_args(driver: str) -> dict:
+    """DBAPI connect() kwargs: utf8mb4, socket timeouts, optional compression."""
+    args = {
+        "charset": CONNECT_DEFAULTS["charset"],
+        "read_timeout": int(
+            os.getenv("DB_READ_TIMEOUT", CONNECT_DEFAULTS["read_timeout"])
+        ),
+        "write_timeout": int(
+            os.getenv("DB_WRITE_TIMEOUT", CONNECT_DEFAULTS["write_timeout"])
+        ),
+    }
+    # Protocol compression (env DB_COMPRESS) is only implemented by mysqlclient;
+    # PyMySQL raises NotImplementedError for it
+    compress = os.getenv("DB_COMPRESS", "").strip().lower()
+    if driver == "mysqldb" and compress in ("1", "true", "yes", "on"):
+        args["compress"] = True
+    return args
+
+
+def _build_mysql_url(database: str | None, driver: str) -> str:
     """Build SQLAlchemy URL for MySQL."""
     user = os.getenv("MYSQL_USER", "text2sql_user")
     password = os.getenv("MYSQL_PASSWORD", "text2sql_pass")
@@ -44,10 +138,10 @@ def _build_mysql_url(database: str | None) -> str:
     port = os.getenv("MYSQL_PORT", "3306")
     db_name = database or os.getenv("MYSQL_DATABASE", "text2sql_db")
 
-    return f"mysql+pymysql://{user}:{password}@{host}:{port}/{db_name}"
+    return f"mysql+{driver}://{user}:{password}@{host}:{port}/{db_name}"
 
 
-def _build_mariadb_url(database: str | None) -> str:
+def _build_mariadb_url(database: str | None, driver: str) -> str:
     """Build SQLAlchemy URL for MariaDB (via MySQL protocol)."""
     user = os.getenv("MARIADB_USER", "text2sql_user")
     password = os.getenv("MARIADB_PASSWORD", "text2sql_pass")
@@ -56,36 +150,175 @@ def _build_mariadb_url(database: str | None) -> str:
     port = os.getenv("MARIADB_PORT", "3307")
     db_name = database or os.getenv("MARIADB_DATABASE", "text2sql_db")
 
-    return f"mysql+pymysql://{user}:{password}@{host}:{port}/{db_name}"
+    return f"mysql+{driver}://{user}:{password}@{host}:{port}/{db_name}"
+
+
+def _build_url(db_type: str, database: str | None, driver: str) -> str:
+    if db_type == "mysql":
+        return _build_mysql_url(database, driver)
+    if db_type == "mariadb":
+        return _build_mariadb_url(database, driver)
+    raise ValueError(f"Unsupported db_type: {db_type!r}. Use 'mysql' or 'mariadb'.")
 
 
 # --- Public API ----------------------------------------------------------------
 
 
-def get_engine(db_type: str, database: str | None = None, echo: bool = False):
+def get_engine(
+    db_type: str,
+    database: str | None = None,
+    echo: bool = False,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    pool_timeout: int | None = None,
+    pool_recycle: int | None = None,
+    pre_ping: bool | None = None,
+):
     """
     Return a SQLAlchemy engine for the given database type.
 
+    Engines are cached per (db_type, database); the pool options only take
+    effect when the engine is first created.
+
     Args:
         db_type: 'mysql' or 'mariadb' (case-insensitive)
         database: Optional database name override. If None, use .env defaults.
         echo: If True, SQLAlchemy will log all SQL statements.
+        pool_size: Persistent connections kept in the pool
+            (env: MYSQL_POOL_SIZE / MARIADB_POOL_SIZE, default 10).
+        max_overflow: Extra connections allowed above pool_size
+            (env: MYSQL_MAX_OVERFLOW / MARIADB_MAX_OVERFLOW, default 20).
+        pool_timeout: Seconds to wait for a free connection (default 30).
+        pool_recycle: Recycle connections older than this many seconds (default 1800).
+        pre_ping: Issue a liveness ping on every checkout (env: DB_POOL_PRE_PING,
+            default False). pool_recycle already replaces stale connections and
+            DatabaseManager.execute_query retries once on an invalidated one.
+
+    The DBAPI driver is chosen by env DB_DRIVER: 'pymysql' (default) or
+    'mysqldb' (mysqlclient, C extension). Connections use utf8mb4, 60s
+    read/write socket timeouts (env DB_READ_TIMEOUT / DB_WRITE_TIMEOUT),
+    READ COMMITTED isolation, and protocol compression with mysqldb when
+    env DB_COMPRESS is set.
 
     Returns:
         sqlalchemy.engine.Engine instance.
 
     Raises:
-        ValueError: if db_type is not supported.
+        ValueError: if db_type or DB_DRIVER is not supported.
     """
     db_type = db_type.lower()
+    driver = _driver()
+    url = _build_url(db_type, database, driver)
 
-    if db_type == "mysql":
-        url = _build_mysql_url(database)
-    elif db_type == "mariadb":
-        url = _build_mariadb_url(database)
-    else:
-        raise ValueError(f"Unsupported db_type: {db_type!r}. Use 'mysql' or 'mariadb'.")
-
-    # pool_pre_ping=True helps avoid stale connections
-    engine = create_engine(url, pool_pre_ping=True, echo=echo, future=True)
+    key = (db_type, database)
+    with _ENGINE_LOCK:
+        engine = _ENGINE_CACHE.get(key)
+        if engine is not None:
+            return engine
+
+        engine = create_engine(
+            url,
+            connect_args=_connect_args(driver),
+            isolation_level=ISOLATION_LEVEL,
+            pool_pre_ping=_pre_ping_option(pre_ping),
+            echo=echo,
+            future=True,
+            pool_size=_pool_option(db_type, "pool_size", pool_size),
+            max_overflow=_pool_option(db_type, "max_overflow", max_overflow),
+            pool_timeout=_pool_option(db_type, "pool_timeout", pool_timeout),
+            pool_recycle=_pool_option(db_type, "pool_recycle", pool_recycle),
+        )
+        _ENGINE_CACHE[key] = engine
+        return engine
+
+
+def acquire_engine(db_type: str, database: str | None = None, **kwargs):
+    """
+    Same as get_engine, but registers the caller as an owner of the engine.
+
+    Every acquire_engine call must be paired with a release_engine call.
+    """
+    engine = get_engine(db_type, database, **kwargs)
+    key = (db_type.lower(), database)
+    with _ENGINE_LOCK:
+        _ENGINE_REFS[key] = _ENGINE_REFS.get(key, 0) + 1
     return engine
+
+
+def release_engine(db_type: str, database: str | None = None) -> bool:
+    """
+    Drop one owner reference; dispose the engine when none are left.
+
+    Returns:
+        True if the engine was disposed and evicted from the cache.
+    """
+    key = (db_type.lower(), database)
+    with _ENGINE_LOCK:
+        refs = _ENGINE_REFS.get(key, 0) - 1
+        if refs > 0:
+            _ENGINE_REFS[key] = refs
+            return False
+        _ENGINE_REFS.pop(key, None)
+        engine = _ENGINE_CACHE.pop(key, None)
+
+    if engine is not None:
+        engine.dispose()
+    return True
+
+
+def get_async_engine(
+    db_type: str,
+    database: str | None = None,
+    echo: bool = False,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+    pool_timeout: int | None = None,
+    pool_recycle: int | None = None,
+    pre_ping: bool | None = None,
+):
+    """
+    Return an AsyncEngine (AsyncAdaptedQueuePool) for the given database type.
+
+    Same options and caching as get_engine. The driver is chosen by env
+    DB_ASYNC_DRIVER: 'asyncmy' (default) or 'aiomysql'; it is only imported
+    when the first async engine is created.
+
+    Returns:
+        sqlalchemy.ext.asyncio.AsyncEngine instance.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    db_type = db_type.lower()
+    url = _build_url(
+        db_type, database, _driver("DB_ASYNC_DRIVER", SUPPORTED_ASYNC_DRIVERS)
+    )
+
+    key = (db_type, database)
+    with _ENGINE_LOCK:
+        engine = _ASYNC_ENGINE_CACHE.get(key)
+        if engine is not None:
+            return engine
+
+        engine = create_async_engine(
+            url,
+            connect_args={"charset": CONNECT_DEFAULTS["charset"]},
+            isolation_level=ISOLATION_LEVEL,
+            pool_pre_ping=_pre_ping_option(pre_ping),
+            echo=echo,
+            pool_size=_pool_option(db_type, "pool_size", pool_size),
+            max_overflow=_pool_option(db_type, "max_overflow", max_overflow),
+            pool_timeout=_pool_option(db_type, "pool_timeout", pool_timeout),
+            pool_recycle=_pool_option(db_type, "pool_recycle", pool_recycle),
+        )
+        _ASYNC_ENGINE_CACHE[key] = engine
+        return engine
+
+
+async def dispose_async_engines() -> None:
+    """Dispose every cached async engine (call before the event loop closes)."""
+    with _ENGINE_LOCK:
+        engines = list(_ASYNC_ENGINE_CACHE.values())
+        _ASYNC_ENGINE_CACHE.clear()
+
+    for engine in engines:
+        await engine.dispose()
@@ -3,18 +3,146 @@ database/db_manager.py
 Enhanced database manager with support for text2sql datasets
 """
 
-from typing import Dict, List, Set
-import pandas as pd
 import time
 import json
-from pyparsing import Dict
+import os
 from pathlib import Path
-from sqlalchemy import text, inspect
-from database.connection import get_engine
+from sqlalchemy import bindparam, text, inspect
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from database.connection import (
+    acquire_engine,
+    get_async_engine,
+    get_engine,
+    release_engine,
+)
 import re
 from difflib import SequenceMatcher
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+# pandas is imported on first row-returning query; tools that only need
+# engines or schema metadata skip its import cost
+_pd = None
+
+
+def _pandas():
+    global _pd
+    if _pd is None:
+        import pandas
+
+        _pd = pandas
+    return _pd
+
+
+# On-disk schema cache (see DatabaseManager.get_schema_info)
+SCHEMA_CACHE_DIR = Path(
+    os.getenv("SCHEMA_CACHE_DIR", Path.home() / ".cache" / "adis25" / "schema")
+)
+# Characters replaced in schema cache file names (the host may be an IPv6 literal)
+_PATH_UNSAFE_RE = re.compile(r"[^\w.-]")
+
+# Default execute_query chunk_size (env DB_STREAM_CHUNK_ROWS); 0 = buffered fetch
+STREAM_CHUNK_ROWS = int(os.getenv("DB_STREAM_CHUNK_ROWS", "0"))
+
+# Statements the connectorx (backend="arrow") path can run
+_SELECT_RE = re.compile(r"\s*(?:select|with)\b", re.IGNORECASE)
+
+# How long list_databases() reuses its SHOW DATABASES result (seconds)
+DATABASES_TTL = 10.0
+
+# Identifier / question tokenization (see DatabaseManager._split_ident)
+_CAMEL_RE = re.compile(r"([a-z])([A-Z])")
+_DIGIT_RE1 = re.compile(r"(\D)(\d)")
+_DIGIT_RE2 = re.compile(r"(\d)(\D)")
+_TOK_RE = re.compile(r"[A-Za-z0-9]+")
+# Stemming suffixes; the lazy stem (>= 2 chars) lets the longest suffix win
+_SUFFIX_RE = re.compile(r"(.{2,}?)(?:ing|ed|es|s)\Z", re.DOTALL)
+
+_STOPWORDS = frozenset(
+    {
+        "a",
+        "an",
+        "the",
+        "all",
+        "any",
+        "from",
+        "to",
+        "of",
+        "in",
+        "on",
+        "at",
+        "for",
+        "with",
+        "and",
+        "or",
+        "is",
+        "are",
+        "was",
+        "were",
+        "be",
+        "been",
+        "do",
+        "does",
+        "did",
+        "list",
+        "show",
+        "give",
+        "get",
+        "find",
+        "what",
+        "which",
+        "who",
+        "where",
+        "when",
+        "how",
+        "many",
+        "much",
+    }
+)
+
+# Bulk introspection queries (see DatabaseManager._bulk_introspect)
+_COLUMNS_SQL = """
+    SELECT c.TABLE_NAME, c.COLUMN_NAME, UPPER(c.COLUMN_TYPE), c.IS_NULLABLE, c.COLUMN_DEFAULT
+    FROM information_schema.COLUMNS c
+    JOIN information_schema.TABLES t
+      ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+    WHERE c.TABLE_SCHEMA = DATABASE() AND t.TABLE_TYPE = 'BASE TABLE'
+    ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+"""
+
+_PK_SQL = """
+    SELECT k.TABLE_NAME, k.COLUMN_NAME
+    FROM information_schema.TABLE_CONSTRAINTS tc
+    JOIN information_schema.KEY_COLUMN_USAGE k
+      ON k.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA
+     AND k.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+     AND k.TABLE_NAME = tc.TABLE_NAME
+    WHERE tc.TABLE_SCHEMA = DATABASE() AND tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
+    ORDER BY k.TABLE_NAME, k.ORDINAL_POSITION
+"""
+
+_FK_SQL = """
+    SELECT k.TABLE_NAME, k.CONSTRAINT_NAME, k.COLUMN_NAME,
+           k.REFERENCED_TABLE_NAME, k.REFERENCED_COLUMN_NAME
+    FROM information_schema.REFERENTIAL_CONSTRAINTS rc
+    JOIN information_schema.KEY_COLUMN_USAGE k
+      ON k.CONSTRAINT_SCHEMA = rc.CONSTRAINT_SCHEMA
+     AND k.CONSTRAINT_NAME = rc.CONSTRAINT_NAME
+     AND k.TABLE_NAME = rc.TABLE_NAME
+    WHERE k.TABLE_SCHEMA = DATABASE()
+    ORDER BY k.TABLE_NAME, k.CONSTRAINT_NAME, k.ORDINAL_POSITION
+"""
+
+# Base tables of the dataset databases (see DatabaseManager.prefetch_dataset_info)
+_DATASET_TABLES_SQL = """
+    SELECT s.SCHEMA_NAME, t.TABLE_NAME
+    FROM information_schema.SCHEMATA s
+    LEFT JOIN information_schema.TABLES t
+      ON t.TABLE_SCHEMA = s.SCHEMA_NAME AND t.TABLE_TYPE = 'BASE TABLE'
+    WHERE s.SCHEMA_NAME IN :names
+    ORDER BY s.SCHEMA_NAME, t.TABLE_NAME
+"""
+
 
 class DatabaseManager:
     """Enhanced database manager for text2sql experiments"""
@@ -27,26 +155,62 @@ class DatabaseManager:
         "yelp": "yelp",
     }
 
-    def __init__(self, db_type, database=None):
+    def __init__(
+        self,
+        db_type,
+        database=None,
+        pool_size: int | None = None,
+        max_overflow: int | None = None,
+        pool_timeout: int | None = None,
+        pool_recycle: int | None = None,
+        pre_ping: bool | None = None,
+    ):
         """
         Initialize database manager
 
         Args:
             db_type: 'mysql' or 'mariadb'
             database: Optional specific database
+            pool_size, max_overflow, pool_timeout, pool_recycle, pre_ping:
+                Optional pool overrides forwarded to get_engine
         """
         self.db_type = db_type.lower()
         self.database = database
-        self.engine = get_engine(self.db_type, database)
+        self._engine_opts = {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+            "pool_recycle": pool_recycle,
+            "pre_ping": pre_ping,
+        }
+        # Databases whose engines this manager holds a reference to
+        self._held_databases: Set[Optional[str]] = set()
+        self.engine = self._engine_for(database)
         # Caches (per database) to keep schema filtering fast & deterministic
+        self._schema_info_cache: Dict[str, Dict[str, dict]] = {}
+        self._schema_str_cache: Dict[str, str] = {}
         self._schema_map_cache: Dict[str, Dict[str, List[str]]] = {}
         self._fk_graph_cache: Dict[str, Dict[str, Set[str]]] = {}
+        self._table_token_cache: Dict[str, Dict[str, Dict[str, frozenset]]] = {}
+        self._token_index_cache: Dict[str, tuple] = {}
+        self._compact_cache: Dict[tuple, str] = {}
+        self._inspector_cache: Dict[str, Any] = {}
+        self._databases_cache: Optional[Tuple[float, List[str]]] = None
+        self._dataset_info_cache: Optional[Dict[str, dict]] = None
 
         print(f"✅ Connected to {self.db_type.upper()}")
         if database:
             print(f"   Database: {database}")
 
-    def execute_query(self, sql, params=None, timeout=30):
+    def execute_query(
+        self,
+        sql,
+        params=None,
+        timeout=30,
+        as_dataframe=True,
+        chunk_size=None,
+        backend="sqlalchemy",
+    ):
         """
         Execute SQL query
 
@@ -54,30 +218,63 @@ class DatabaseManager:
             sql: SQL query string
             params: Optional parameters
             timeout: Query timeout in seconds
+            as_dataframe: If False, return the raw list of row tuples
+            chunk_size: Stream rows through a server-side cursor in chunks
+                of this many rows (for large result sets); defaults to
+                STREAM_CHUNK_ROWS, 0 disables streaming
+            backend: 'arrow' reads SELECTs through connectorx into Arrow-typed
+                columns (optional dependency); other statements, params and
+                as_dataframe=False always use SQLAlchemy
 
         Returns:
             dict: {
                 'success': bool,
-                'result': DataFrame or None,
+                'result': DataFrame, list of rows, or None,
                 'rows_affected': int,
                 'execution_time': float,
                 'error': str or None
             }
         """
         start_time = time.time()
+        if chunk_size is None:
+            chunk_size = STREAM_CHUNK_ROWS
 
         try:
-            with self.engine.connect() as conn:
-                result = conn.execute(text(sql), params or {})
-
-                if result.returns_rows:
-                    df = pd.DataFrame(result.fetchall(), columns=result.keys())
-                    rows_affected = len(df)
-                else:
-                    df = None
-                    rows_affected = result.rowcount
-
-                conn.commit()
+            if (
+                backend == "arrow"
+                and as_dataframe
+                and not params
+                and _SELECT_RE.match(sql)
+            ):
+                df = self._read_arrow(sql)
+                rows_affected = len(df)
+            else:
+                for attempt in range(2):
+                    try:
+                        with self.engine.connect() as conn:
+                            if chunk_size:
+                                conn.execution_options(
+                                    stream_results=True, max_row_buffer=chunk_size
+                                )
+                            result = conn.execute(text(sql), params or {})
+
+                            if result.returns_rows:
+                                df = self._fetch_result(
+                                    result, as_dataframe, chunk_size
+                                )
+                                rows_affected = len(df)
+                            else:
+                                df = None
+                                rows_affected = result.rowcount
+
+                            conn.commit()
+                        break
+                    except DBAPIError as e:
+                        # No pre-ping: a stale pooled connection surfaces here once,
+                        # the pool has already dropped it, so retry on a fresh one.
+                        if attempt == 0 and e.connection_invalidated:
+                            continue
+                        raise
 
             execution_time = time.time() - start_time
 
@@ -102,6 +299,135 @@ class DatabaseManager:
                 "db_type": self.db_type,
             }
 
+    async def execute_query_async(self, sql, params=None, as_dataframe=True):
+        """
+        Async variant of execute_query on the shared AsyncEngine, e.g.
+
+            await asyncio.gather(*(db.execute_query_async(q) for q in batch))
+
+        runs a batch concurrently, bounded by the async pool size.
+
+        Returns:
+            dict: same shape as execute_query
+        """
+        start_time = time.time()
+
+        try:
+            engine = get_async_engine(self.db_type, self.database, **self._engine_opts)
+            for attempt in range(2):
+                try:
+                    async with engine.connect() as conn:
+                        result = await conn.execute(text(sql), params or {})
+
+                        if result.returns_rows:
+                            df = self._fetch_result(result, as_dataframe, None)
+                            rows_affected = len(df)
+                        else:
+                            df = None
+                            rows_affected = result.rowcount
+
+                        await conn.commit()
+                    break
+                except DBAPIError as e:
+                    if attempt == 0 and e.connection_invalidated:
+                        continue
+                    raise
+
+            return {
+                "success": True,
+                "result": df,
+                "rows_affected": rows_affected,
+                "execution_time": time.time() - start_time,
+                "error": None,
+                "db_type": self.db_type,
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "result": None,
+                "rows_affected": 0,
+                "execution_time": time.time() - start_time,
+                "error": str(e),
+                "db_type": self.db_type,
+            }
+
+    def execute_many(self, sql, param_list, page_size=1000):
+        """
+        Execute one parameterized statement for many parameter sets
+
+        Each page of parameter dicts goes to the driver as a single
+        executemany call (pymysql folds INSERT ... VALUES into multi-row
+        inserts), all inside one transaction.
+
+        Args:
+            sql: SQL statement with :named parameters
+            param_list: List of parameter dicts
+            page_size: Parameter sets sent per executemany call
+
+        Returns:
+            dict: {'success', 'rows_affected', 'execution_time', 'error'}
+        """
+        start_time = time.time()
+
+        try:
+            stmt = text(sql)
+            rows_affected = 0
+            with self.engine.begin() as conn:
+                for i in range(0, len(param_list), page_size):
+                    result = conn.execute(stmt, param_list[i : i + page_size])
+                    rows_affected += max(result.rowcount, 0)
+
+            return {
+                "success": True,
+                "rows_affected": rows_affected,
+                "execution_time": time.time() - start_time,
+                "error": None,
+                "db_type": self.db_type,
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "rows_affected": 0,
+                "execution_time": time.time() - start_time,
+                "error": str(e),
+                "db_type": self.db_type,
+            }
+
+    def _read_arrow(self, sql):
+        """Run a SELECT through connectorx (columnar fetch, no per-cell PyObjects)"""
+        import connectorx
+
+        url = self.engine.url.set(drivername="mysql")
+        return connectorx.read_sql(
+            url.render_as_string(hide_password=False), sql, return_type="pandas"
+        )
+
+    @staticmethod
+    def _fetch_result(result, as_dataframe, chunk_size):
+        """Collect a row-returning result as a DataFrame or a list of rows"""
+        keys = list(result.keys())
+
+        if not chunk_size:
+            rows = result.fetchall()
+            if not as_dataframe:
+                return rows
+            return _pandas().DataFrame.from_records(rows, columns=keys)
+
+        # Server-side cursor: only one chunk of Row objects is alive at a time
+        if not as_dataframe:
+            return [row for part in result.partitions(chunk_size) for row in part]
+
+        pd = _pandas()
+        frames = [
+            pd.DataFrame.from_records(part, columns=keys)
+            for part in result.partitions(chunk_size)
+        ]
+        if not frames:
+            return pd.DataFrame(columns=keys)
+        return pd.concat(frames, ignore_index=True)
+
     def get_schema(self, database=None):
         """
         Get database schema as formatted string
@@ -115,37 +441,36 @@ class DatabaseManager:
         if database:
             self.switch_database(database)
 
-        inspector = inspect(self.engine)
-        tables = inspector.get_table_names()
+        db_key = self.database or ""
+        if db_key in self._schema_str_cache:
+            return self._schema_str_cache[db_key]
 
-        schema_lines = []
+        schema_info = self.get_schema_info()
 
-        for table in tables:
-            columns = inspector.get_columns(table)
-            pk = inspector.get_pk_constraint(table)
-            fks = inspector.get_foreign_keys(table)
+        schema_lines = []
 
+        for table, info in schema_info.items():
             # Build CREATE TABLE
             schema_lines.append(f"CREATE TABLE {table} (")
 
             col_defs = []
-            for col in columns:
-                col_type = str(col["type"])
-                col_def = f"    {col['name']} {col_type}"
-
+            for col in info["columns"]:
+                # One join per column instead of a new string per suffix
+                parts = ["    ", col["name"], " ", str(col["type"])]
                 if not col["nullable"]:
-                    col_def += " NOT NULL"
-                if col.get("default"):
-                    col_def += f" DEFAULT {col['default']}"
+                    parts.append(" NOT NULL")
+                default = col.get("default")
+                if default:
+                    parts += [" DEFAULT ", str(default)]
 
-                col_defs.append(col_def)
+                col_defs.append("".join(parts))
 
             # Add constraints
-            if pk["constrained_columns"]:
-                pk_cols = ", ".join(pk["constrained_columns"])
+            if info["pk"]:
+                pk_cols = ", ".join(info["pk"])
                 col_defs.append(f"    PRIMARY KEY ({pk_cols})")
 
-            for fk in fks:
+            for fk in info["fks"]:
                 fk_cols = ", ".join(fk["constrained_columns"])
                 ref_table = fk["referred_table"]
                 ref_cols = ", ".join(fk["referred_columns"])
@@ -156,7 +481,9 @@ class DatabaseManager:
             schema_lines.append(",\n".join(col_defs))
             schema_lines.append(");\n")
 
-        return "\n".join(schema_lines)
+        schema = "\n".join(schema_lines)
+        self._schema_str_cache[db_key] = schema
+        return schema
 
     def get_schema_for_dataset(self, dataset_name):
         """
@@ -190,10 +517,27 @@ class DatabaseManager:
         - Uses full schema_map + deterministic scoring for relevance
         - Optionally expands by 1-hop FK neighbors for joinability
         - Caches schema info per database
+        - Caches the result per (database, options, question tokens)
         """
         if database:
             self.switch_database(database)
 
+        # Ranking only sees the question's normalized token set, so phrasings
+        # that normalize to the same tokens share one entry
+        q_key = None
+        if question and max_tables is not None:
+            q_key = frozenset(self._normalize_tokens(question))
+        cache_key = (
+            self.database or "",
+            include_types,
+            max_tables,
+            q_key,
+            add_fk_neighbors,
+        )
+        cached = self._compact_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         schema_map = self.get_schema_map()  # cached
         fk_graph = self.get_fk_graph() if (question and add_fk_neighbors) else None
 
@@ -212,27 +556,158 @@ class DatabaseManager:
         else:
             tables = sorted(tables)
 
-        inspector = inspect(self.engine)
+        schema_info = self.get_schema_info()
 
         lines = []
         for table in tables:
-            cols = inspector.get_columns(
-                table
-            )  # or schema_map[table], but types need inspector
             if include_types:
-                col_str = ", ".join(f"{c['name']} {str(c['type'])}" for c in cols)
+                cols = schema_info[table]["columns"]
+                col_str = ", ".join(f"{c['name']} {c['type']}" for c in cols)
             else:
-                col_str = ", ".join(c["name"] for c in cols)
+                col_str = ", ".join(schema_map[table])
 
             lines.append(f"{table}({col_str})")
 
-        return "\n".join(lines)
+        compact = "\n".join(lines)
+        self._compact_cache[cache_key] = compact
+        return compact
 
         # ----------------------------
 
     # Schema introspection helpers (cached)
     # ----------------------------
 
+    @staticmethod
+    def _schema_version(conn) -> str:
+        """
+        Cheap version tag for the connection's current database schema.
+
+        One information_schema query over table count and MAX(CREATE_TIME) /
+        MAX(UPDATE_TIME). It catches tables being created or dropped, but it is
+        a heuristic, not a DDL detector: on MySQL 8 an INSTANT ADD/RENAME COLUMN
+        leaves CREATE_TIME unchanged, and information_schema_stats_expiry can
+        serve CREATE_TIME/UPDATE_TIME up to 24 h stale. Call
+        invalidate_schema_cache(database, disk=True) after changing a schema.
+        """
+        row = conn.execute(
+            text(
+                "SELECT DATABASE(), COUNT(*), MAX(CREATE_TIME), MAX(UPDATE_TIME) "
+                "FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()"
+            )
+        ).one()
+        return "|".join(str(x) for x in row)
+
+    @staticmethod
+    def _bulk_introspect(conn) -> Dict[str, dict]:
+        """
+        Reflect tables, columns, PKs and FKs of the connection's database.
+
+        Three information_schema queries, grouped per table in Python,
+        instead of 3 inspector round trips per table.
+        """
+        col_rows = conn.execute(text(_COLUMNS_SQL)).fetchall()
+        pk_rows = conn.execute(text(_PK_SQL)).fetchall()
+        fk_rows = conn.execute(text(_FK_SQL)).fetchall()
+
+        schema_info: Dict[str, dict] = {}
+        for table, name, col_type, is_nullable, default in col_rows:
+            info = schema_info.setdefault(table, {"columns": [], "pk": [], "fks": []})
+            # MariaDB reports an explicit NULL default as the string 'NULL'
+            if default is not None and str(default).upper() == "NULL":
+                default = None
+            info["columns"].append(
+                {
+                    "name": name,
+                    "type": col_type,
+                    "nullable": is_nullable == "YES",
+                    "default": default,
+                }
+            )
+
+        for table, name in pk_rows:
+            if table in schema_info:
+                schema_info[table]["pk"].append(name)
+
+        fks_by_constraint: Dict[Tuple[str, str], dict] = {}
+        for table, constraint, name, ref_table, ref_col in fk_rows:
+            if table not in schema_info:
+                continue
+            fk = fks_by_constraint.get((table, constraint))
+            if fk is None:
+                fk = {
+                    "constrained_columns": [],
+                    "referred_table": ref_table,
+                    "referred_columns": [],
+                }
+                fks_by_constraint[(table, constraint)] = fk
+                schema_info[table]["fks"].append(fk)
+            fk["constrained_columns"].append(name)
+            fk["referred_columns"].append(ref_col)
+
+        return schema_info
+
+    def _schema_cache_path(self, db_key: str | None = None) -> Path:
+        if db_key is None:
+            db_key = self.database or ""
+        # Same database name on two servers must not share a cache file
+        url = self.engine.url
+        server = _PATH_UNSAFE_RE.sub(
+            "_", f"{url.host or 'localhost'}_{url.port or 'default'}"
+        )
+        return SCHEMA_CACHE_DIR / f"{self.db_type}_{server}_{db_key or 'default'}.json"
+
+    def get_schema_info(self, database: str | None = None) -> Dict[str, dict]:
+        """
+        Return introspected schema:
+          {table: {"columns": [{name, type, nullable, default}, ...],
+                   "pk": [col, ...],
+                   "fks": [{constrained_columns, referred_table, referred_columns}, ...]}}
+
+        Cached in memory per database, and on disk (SCHEMA_CACHE_DIR, one file
+        per server host/port and database) tagged with _schema_version(), so later
+        runs skip reflection entirely. The tag can miss DDL (see _schema_version):
+        call invalidate_schema_cache(database, disk=True) after altering tables.
+        """
+        if database:
+            self.switch_database(database)
+
+        db_key = self.database or ""
+        if db_key in self._schema_info_cache:
+            return self._schema_info_cache[db_key]
+
+        cache_path = self._schema_cache_path()
+
+        # Version check and (on a miss) introspection share one connection
+        with self.engine.connect() as conn:
+            version = self._schema_version(conn)
+
+            schema_info = None
+            try:
+                cached = json.loads(cache_path.read_text(encoding="utf-8"))
+                if cached.get("version") == version:
+                    schema_info = cached["tables"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+            fresh = schema_info is None
+            if fresh:
+                schema_info = self._bulk_introspect(conn)
+
+        if fresh:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                cache_path.write_text(
+                    json.dumps(
+                        {"version": version, "tables": schema_info}, default=str
+                    ),
+                    encoding="utf-8",
+                )
+            except OSError:
+                pass  # disk cache is best-effort
+
+        self._schema_info_cache[db_key] = schema_info
+        return schema_info
+
     def get_schema_map(self, database: str | None = None) -> Dict[str, List[str]]:
         """
         Return full schema as a dict:
@@ -247,15 +722,13 @@ class DatabaseManager:
         if db_key in self._schema_map_cache:
             return self._schema_map_cache[db_key]
 
-        inspector = inspect(self.engine)
-        tables = inspector.get_table_names()
-
-        schema_map: Dict[str, List[str]] = {}
-        for t in tables:
-            cols = inspector.get_columns(t)
-            schema_map[t] = [c["name"] for c in cols]
+        schema_map: Dict[str, List[str]] = {
+            t: [c["name"] for c in info["columns"]]
+            for t, info in self.get_schema_info().items()
+        }
 
         self._schema_map_cache[db_key] = schema_map
+        self._table_tokens(schema_map)  # ranking tokens depend only on schema
         return schema_map
 
     def get_fk_graph(self, database: str | None = None) -> Dict[str, Set[str]]:
@@ -272,18 +745,12 @@ class DatabaseManager:
         if db_key in self._fk_graph_cache:
             return self._fk_graph_cache[db_key]
 
-        inspector = inspect(self.engine)
-        tables = inspector.get_table_names()
-
-        graph: Dict[str, Set[str]] = {t: set() for t in tables}
+        schema_info = self.get_schema_info()
 
-        for t in tables:
-            try:
-                fks = inspector.get_foreign_keys(t) or []
-            except Exception:
-                fks = []
+        graph: Dict[str, Set[str]] = {t: set() for t in schema_info}
 
-            for fk in fks:
+        for t, info in schema_info.items():
+            for fk in info["fks"]:
                 ref = fk.get("referred_table")
                 if not ref:
                     continue
@@ -295,6 +762,42 @@ class DatabaseManager:
         self._fk_graph_cache[db_key] = graph
         return graph
 
+    def invalidate_schema_cache(self, database: str | None = None, disk=False):
+        """
+        Drop cached schema data (switch_database never does this, schemas are
+        static across a run).
+
+        Args:
+            database: Only flush this database; None flushes every database
+            disk: Also delete the on-disk schema cache file(s)
+        """
+        per_db_caches = (
+            self._schema_info_cache,
+            self._schema_str_cache,
+            self._schema_map_cache,
+            self._fk_graph_cache,
+            self._table_token_cache,
+            self._token_index_cache,
+            self._inspector_cache,
+        )
+
+        if database is None:
+            db_keys = set().union(*per_db_caches)
+            for cache in per_db_caches:
+                cache.clear()
+            self._compact_cache.clear()
+        else:
+            db_keys = {database}
+            for cache in per_db_caches:
+                cache.pop(database, None)
+            for key in [k for k in self._compact_cache if k[0] == database]:
+                del self._compact_cache[key]
+        self._dataset_info_cache = None
+
+        if disk:
+            for db_key in db_keys:
+                self._schema_cache_path(db_key).unlink(missing_ok=True)
+
     # ----------------------------
     # Improved schema filtering
     # ----------------------------
@@ -302,76 +805,90 @@ class DatabaseManager:
     @staticmethod
     def _split_ident(s: str) -> List[str]:
         s = s.replace("_", " ")
-        s = re.sub(r"([a-z])([A-Z])", r"\1 \2", s)
-        s = re.sub(r"(\D)(\d)", r"\1 \2", s)
-        s = re.sub(r"(\d)(\D)", r"\1 \2", s)
-        return [t for t in re.findall(r"[A-Za-z0-9]+", s) if t]
+        s = _CAMEL_RE.sub(r"\1 \2", s)
+        s = _DIGIT_RE1.sub(r"\1 \2", s)
+        s = _DIGIT_RE2.sub(r"\1 \2", s)
+        return _TOK_RE.findall(s)
 
     @staticmethod
+    @lru_cache(maxsize=16384)
     def _stem(tok: str) -> str:
-        # tiny deterministic stemmer (plural + common suffixes)
-        if len(tok) > 4 and tok.endswith("ing"):
-            return tok[:-3]
-        if len(tok) > 3 and tok.endswith("ed"):
-            return tok[:-2]
-        if len(tok) > 3 and tok.endswith("es"):
-            return tok[:-2]
-        if len(tok) > 2 and tok.endswith("s"):
-            return tok[:-1]
-        return tok
+        # tiny deterministic stemmer (plural + common suffixes): strips
+        # -ing / -ed / -es / -s while keeping a stem of at least 2 chars
+        m = _SUFFIX_RE.match(tok)
+        return m.group(1) if m else tok
 
     @classmethod
-    def _normalize_tokens(cls, text: str) -> List[str]:
-        STOPWORDS = {
-            "a",
-            "an",
-            "the",
-            "all",
-            "any",
-            "from",
-            "to",
-            "of",
-            "in",
-            "on",
-            "at",
-            "for",
-            "with",
-            "and",
-            "or",
-            "is",
-            "are",
-            "was",
-            "were",
-            "be",
-            "been",
-            "do",
-            "does",
-            "did",
-            "list",
-            "show",
-            "give",
-            "get",
-            "find",
-            "what",
-            "which",
-            "who",
-            "where",
-            "when",
-            "how",
-            "many",
-            "much",
-        }
-        toks = []
-        for raw in cls._split_ident(text.lower()):
-            if raw in STOPWORDS:
-                continue
-            toks.append(cls._stem(raw))
-        return toks
+    @lru_cache(maxsize=4096)
+    def _normalize_tokens(cls, text: str) -> Tuple[str, ...]:
+        # _split_ident inlined into one pass; the camelCase split is a no-op
+        # on lowercased text, so it is skipped
+        text = text.lower().replace("_", " ")
+        text = _DIGIT_RE1.sub(r"\1 \2", text)
+        text = _DIGIT_RE2.sub(r"\1 \2", text)
+        return tuple(
+            cls._stem(raw) for raw in _TOK_RE.findall(text) if raw not in _STOPWORDS
+        )
 
     @staticmethod
+    @lru_cache(maxsize=65536)
     def _ratio(a: str, b: str) -> float:
+        # memoized: question/table token pairs repeat heavily across questions
         return SequenceMatcher(None, a, b).ratio()
 
+    def _table_tokens(
+        self, schema_map: Dict[str, List[str]]
+    ) -> Dict[str, Dict[str, frozenset]]:
+        """
+        Stemmed tokens per table, built once per database:
+          {table: {"t": table_name_tokens, "c": column_name_tokens}}
+        """
+        db_key = self.database or ""
+        if db_key in self._table_token_cache:
+            return self._table_token_cache[db_key]
+
+        table_tokens = {
+            table: {
+                "t": frozenset(self._stem(x.lower()) for x in self._split_ident(table)),
+                "c": frozenset(
+                    self._stem(x.lower()) for c in cols for x in self._split_ident(c)
+                ),
+            }
+            for table, cols in schema_map.items()
+        }
+
+        self._table_token_cache[db_key] = table_tokens
+        return table_tokens
+
+    def _token_index(
+        self, schema_map: Dict[str, List[str]]
+    ) -> Tuple[Dict[str, int], List[Tuple[str, frozenset, int, int]]]:
+        """
+        Token bitmaps for question ranking, built once per database:
+          vocab: {stemmed_token: bit_position}
+          table_bits: [(table, table_tokens, table_token_bits, column_token_bits), ...]
+        """
+        db_key = self.database or ""
+        if db_key in self._token_index_cache:
+            return self._token_index_cache[db_key]
+
+        vocab: Dict[str, int] = {}
+
+        def to_bits(tokens: frozenset) -> int:
+            bits = 0
+            for tok in tokens:
+                bits |= 1 << vocab.setdefault(tok, len(vocab))
+            return bits
+
+        table_bits: List[Tuple[str, frozenset, int, int]] = []
+        for table, tokens in self._table_tokens(schema_map).items():
+            table_bits.append(
+                (table, tokens["t"], to_bits(tokens["t"]), to_bits(tokens["c"]))
+            )
+
+        self._token_index_cache[db_key] = (vocab, table_bits)
+        return vocab, table_bits
+
     def _rank_tables_for_question(
         self,
         question: str,
@@ -387,25 +904,31 @@ class DatabaseManager:
         q_tokens = self._normalize_tokens(question)
         q_set = set(q_tokens)
 
-        ranked: List[Tuple[str, float]] = []
+        vocab, table_bits = self._token_index(schema_map)
+        q_bits = 0
+        for tok in q_set:
+            bit = vocab.get(tok)
+            if bit is not None:
+                q_bits |= 1 << bit
 
-        for table, cols in schema_map.items():
-            t_tokens = {self._stem(x.lower()) for x in self._split_ident(table)}
-            c_tokens: Set[str] = set()
-            for c in cols:
-                for x in self._split_ident(c):
-                    c_tokens.add(self._stem(x.lower()))
+        ranked: List[Tuple[str, float]] = []
 
-            table_hits = len(q_set & t_tokens)
-            col_hits = len(q_set & c_tokens)
+        for table, t_tokens, t_bits, c_bits in table_bits:
+            # |Q ∩ tokens| as popcount of the AND of the token bitmaps
+            table_hits = (q_bits & t_bits).bit_count()
+            col_hits = (q_bits & c_bits).bit_count()
 
             score = table_weight * table_hits + col_weight * col_hits
 
             # fuzzy helps "flights" ~ "flight", small typos, etc.
-            best_fuzzy = 0.0
-            for qt in q_tokens:
-                for tt in t_tokens:
-                    best_fuzzy = max(best_fuzzy, self._ratio(qt, tt))
+            # (an exact token hit already is the maximum ratio of 1.0)
+            if table_hits:
+                best_fuzzy = 1.0
+            else:
+                best_fuzzy = max(
+                    (self._ratio(qt, tt) for qt in q_set for tt in t_tokens),
+                    default=0.0,
+                )
             score += fuzzy_weight * best_fuzzy
 
             ranked.append((table, score))
@@ -445,29 +968,110 @@ class DatabaseManager:
 
         return selected
 
+    def _engine_for(self, database):
+        """Return the shared engine for `database`, taking a reference once."""
+        if database not in self._held_databases:
+            self._held_databases.add(database)
+            return acquire_engine(self.db_type, database, **self._engine_opts)
+        return get_engine(self.db_type, database, **self._engine_opts)
+
     def switch_database(self, database):
-        """Switch to different database"""
+        """Switch to different database (reuses the cached engine/pool)"""
+        if database == self.database and database in self._held_databases:
+            return
         self.database = database
-        self.engine = get_engine(self.db_type, database)
+        self.engine = self._engine_for(database)
+
+    def list_databases(self, refresh=False):
+        """List all databases (cached for DATABASES_TTL seconds unless refresh)"""
+        now = time.monotonic()
+        if (
+            not refresh
+            and self._databases_cache
+            and now - self._databases_cache[0] < DATABASES_TTL
+        ):
+            return list(self._databases_cache[1])
 
-    def list_databases(self):
-        """List all databases"""
-        result = self.execute_query("SHOW DATABASES")
-        if result["success"]:
-            return result["result"]["Database"].tolist()
-        return []
+        try:
+            with self.engine.connect() as conn:
+                # First column by position: no dependence on its 'Database' label
+                databases = conn.exec_driver_sql("SHOW DATABASES").scalars().all()
+        except Exception:
+            return []
+
+        self._databases_cache = (now, databases)
+        return list(databases)
 
     def get_table_names(self, database=None):
         """Get table names"""
         if database:
             self.switch_database(database)
 
-        inspector = inspect(self.engine)
-        return inspector.get_table_names()
+        return self._insp().get_table_names()
+
+    def _insp(self):
+        """
+        Inspector for the current database, created once per database.
+        Its info_cache makes repeated reflection calls free after the first.
+        """
+        db_key = self.database or ""
+        inspector = self._inspector_cache.get(db_key)
+        if inspector is None:
+            inspector = self._inspector_cache[db_key] = inspect(self.engine)
+        return inspector
+
+    def prefetch_dataset_info(self) -> Dict[str, dict]:
+        """
+        Fetch availability and table lists for every DATASET_DATABASES entry
+        with one information_schema query (no database switches).
+
+        Returns:
+            dict: {dataset_name: get_dataset_info(dataset_name), ...}
+            If the query fails, every entry is available=False with the error
+            (not cached, so a later call retries).
+        """
+        if self._dataset_info_cache is not None:
+            return self._dataset_info_cache
+
+        db_names = sorted(set(self.DATASET_DATABASES.values()))
+        stmt = text(_DATASET_TABLES_SQL).bindparams(bindparam("names", expanding=True))
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(stmt, {"names": db_names}).all()
+        except SQLAlchemyError as e:
+            return {
+                dataset_name: {"database": db_name, "available": False, "error": str(e)}
+                for dataset_name, db_name in self.DATASET_DATABASES.items()
+            }
+
+        found: Dict[str, List[str]] = {}
+        for schema_name, table_name in rows:
+            tables = found.setdefault(schema_name, [])
+            if table_name is not None:
+                tables.append(table_name)
+
+        info: Dict[str, dict] = {}
+        for dataset_name, db_name in self.DATASET_DATABASES.items():
+            if db_name in found:
+                info[dataset_name] = {
+                    "database": db_name,
+                    "tables": found[db_name],
+                    "table_count": len(found[db_name]),
+                    "available": True,
+                }
+            else:
+                info[dataset_name] = {
+                    "database": db_name,
+                    "available": False,
+                    "error": "Database not found",
+                }
+
+        self._dataset_info_cache = info
+        return info
 
     def get_dataset_info(self, dataset_name):
         """
-        Get information about a text2sql dataset
+        Get information about a text2sql dataset (from prefetch_dataset_info)
 
         Returns:
             dict: {
@@ -477,27 +1081,11 @@ class DatabaseManager:
                 'available': bool
             }
         """
-        db_name = self.DATASET_DATABASES.get(dataset_name)
-        if not db_name:
+        if dataset_name not in self.DATASET_DATABASES:
             return {"available": False}
 
-        databases = self.list_databases()
-        available = db_name in databases
-
-        if available:
-            tables = self.get_table_names(db_name)
-            return {
-                "database": db_name,
-                "tables": tables,
-                "table_count": len(tables),
-                "available": True,
-            }
-        else:
-            return {
-                "database": db_name,
-                "available": False,
-                "error": "Database not found",
-            }
+        info = self.prefetch_dataset_info()[dataset_name]
+        return {k: list(v) if k == "tables" else v for k, v in info.items()}
 
     def test_dataset_query(self, dataset_name, sql_query):
         """
@@ -525,6 +1113,9 @@ class DatabaseManager:
         return result
 
     def close(self):
-        """Close connection"""
-        self.engine.dispose()
+        """Release engines; pools are disposed once no other manager uses them"""
+        for database in self._held_databases:
+            release_engine(self.db_type, database)
+        self._held_databases.clear()
+        self._inspector_cache.clear()
         print(f"✅ Closed connection to {self.db_type.upper()}")
@@ -1,19 +1,90 @@
+import copy
 import re
 import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
+from transformers import AutoTokenizer, AutoModelForCausalLM, LogitsProcessor, LogitsProcessorList, StoppingCriteria, StoppingCriteriaList
 
 MODEL_ID = "openai-community/gpt2-xl"
 
+# Max distinct schemas kept in the per-agent tokenization caches
+SCHEMA_CACHE_SIZE = 256
+
+# Block repeated n-grams of this size during generation (reduces degeneracy a bit)
+NO_REPEAT_NGRAM_SIZE = 3
+
+class IncrementalNoRepeatNGram(LogitsProcessor):
+    """
+    Same bans as generate(no_repeat_ngram_size=n), but each row's n-gram table
+    is built once from the prompt and then extended by one n-gram per step,
+    instead of rescanning the whole sequence at every step.
+    Use one instance per generate call.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self._seen: list[dict[tuple[int, ...], set[int]]] = []
+        self._len = 0
+
+    def __call__(self, input_ids, scores):
+        n = self.n
+        cur_len = input_ids.shape[1]
+        if cur_len + 1 < n:
+            return scores
+
+        if not self._seen or cur_len <= self._len:
+            rows = input_ids.tolist()
+            self._seen = [{} for _ in rows]
+            start = 0
+        else:
+            # only the tail that can contain n-grams not seen yet
+            rows = input_ids[:, max(self._len - n + 1, 0):].tolist()
+            start = min(self._len, n - 1)
+        self._len = cur_len
+
+        ban_rows, ban_toks = [], []
+        for i, row in enumerate(rows):
+            seen = self._seen[i]
+            for j in range(max(start, n - 1), len(row)):
+                seen.setdefault(tuple(row[j - n + 1:j]), set()).add(row[j])
+            banned = seen.get(tuple(row[len(row) - n + 1:]))
+            if banned:
+                ban_rows.extend([i] * len(banned))
+                ban_toks.extend(banned)
+
+        if ban_rows:
+            scores[ban_rows, ban_toks] = float("-inf")
+        return scores
+
+class StopOnTokenIds(StoppingCriteria):
+    """Finish a row as soon as its last generated token is one of stop_ids."""
+
+    def __init__(self, stop_ids: torch.Tensor):
+        self.stop_ids = stop_ids
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.isin(input_ids[:, -1], self.stop_ids)
+
 class GPT2XLAgent:
-    def __init__(self, device: str | None = None, debug: bool = False):
+    def __init__(self, device: str | None = None, debug: bool = False, compile_model: bool = False):
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         self.debug = debug
 
+        # GPU: half precision + fused SDPA attention (generation is bound by weight reads)
+        # CPU: keep fp32
+        load_kwargs = {}
+        if self.device.startswith("cuda"):
+            load_kwargs["torch_dtype"] = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            load_kwargs["attn_implementation"] = "sdpa"
+
         self.tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
-        self.model = AutoModelForCausalLM.from_pretrained(MODEL_ID).to(self.device)
+        self.model = AutoModelForCausalLM.from_pretrained(MODEL_ID, **load_kwargs).to(self.device)
         self.model.eval()
 
+        # Opt-in: compile the forward used by generate (first calls pay the compile cost)
+        if compile_model:
+            self.model.forward = torch.compile(self.model.forward, mode="reduce-overhead", fullgraph=False)
+
         self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.tokenizer.padding_side = "left"  # batched generation
         self.max_ctx = getattr(self.model.config, "n_positions", 1024)
 
         # Pre-tokenize constant segments for speed/reproducibility
@@ -25,6 +96,26 @@ class GPT2XLAgent:
         self._mid_ids = self.tokenizer(self._mid, add_special_tokens=False).input_ids
         self._suffix_ids = self.tokenizer(self._suffix_template, add_special_tokens=False).input_ids
 
+        # Every token containing ";": _extract_sql cuts there, so later tokens are wasted steps
+        # (byte-level BPE keeps printable ASCII as-is in the token strings)
+        self._semicolon_ids = torch.tensor(
+            sorted(i for tok, i in self.tokenizer.get_vocab().items() if ";" in tok), device=self.device
+        )
+
+        # schema -> (non-empty lines, token count of each line + "\n")
+        self._schema_lines_cache: dict[str, tuple[list[str], list[int]]] = {}
+        # (schema, kept line count) -> token ids of the truncated schema (1-D long tensor)
+        self._schema_ids_cache: dict[tuple[str, int], torch.Tensor] = {}
+        # ((schema, prefix+schema token count), past_key_values) of the last prompt head.
+        # One slot only: a head's KV is ~0.3 MB per token in fp16 (48 layers x K,V x 1600)
+        # and consecutive questions on the same schema are where the hits come from
+        self._schema_kv_slot: tuple[tuple[str, int], object] | None = None
+
+        # Constant segments as CPU long tensors, joined per prompt with torch.cat
+        self._prefix_t = torch.tensor(self._prefix_ids, dtype=torch.long)
+        self._mid_t = torch.tensor(self._mid_ids, dtype=torch.long)
+        self._suffix_t = torch.tensor(self._suffix_ids, dtype=torch.long)
+
     def build_prompt(self, schema: str, question: str) -> str:
         return (
             f"{self._prefix}{schema}"
@@ -32,28 +123,64 @@ class GPT2XLAgent:
             f"{self._suffix_template}"
         )
 
+    def prime_schema(self, schema: str) -> None:
+        """Pre-tokenize a schema (e.g. at dataset switch) so questions on it skip that work."""
+        self._schema_lines(schema)
+
+    def _schema_lines(self, schema: str) -> tuple[list[str], list[int]]:
+        cached = self._schema_lines_cache.get(schema)
+        if cached is None:
+            lines = [ln for ln in schema.splitlines() if ln.strip()]
+            # One batched tokenizer call for all lines (+1 for newline join effect)
+            line_ids = self.tokenizer([ln + "\n" for ln in lines], add_special_tokens=False).input_ids if lines else []
+
+            if len(self._schema_lines_cache) >= SCHEMA_CACHE_SIZE:
+                self._schema_lines_cache.clear()
+            cached = self._schema_lines_cache[schema] = (lines, [len(ids) for ids in line_ids])
+        return cached
+
+    def _kept_line_count(self, schema: str, schema_budget_tokens: int) -> int:
+        if schema_budget_tokens <= 0:
+            return 0
+
+        _, line_lens = self._schema_lines(schema)
+        kept = 0
+        used = 0
+        for n in line_lens:
+            if used + n > schema_budget_tokens:
+                break
+            kept += 1
+            used += n
+        return kept
+
     def _truncate_schema_by_lines(self, schema: str, schema_budget_tokens: int) -> str:
         """
         Keep whole lines (tables) until token budget is met.
         This prevents cutting identifiers mid-token and preserves structure.
         """
-        if schema_budget_tokens <= 0:
-            return ""
+        lines, _ = self._schema_lines(schema)
+        return "\n".join(lines[: self._kept_line_count(schema, schema_budget_tokens)])
 
-        lines = [ln for ln in schema.splitlines() if ln.strip()]
-        kept = []
-        used = 0
-        for ln in lines:
-            # +1 for newline join effect
-            ln_ids = self.tokenizer(ln + "\n", add_special_tokens=False).input_ids
-            if used + len(ln_ids) > schema_budget_tokens:
-                break
-            kept.append(ln)
-            used += len(ln_ids)
+    def _schema_ids(self, schema: str, schema_budget_tokens: int) -> torch.Tensor:
+        """Token ids of the line-truncated schema, cached per (schema, kept lines)."""
+        key = (schema, self._kept_line_count(schema, schema_budget_tokens))
+        ids = self._schema_ids_cache.get(key)
+        if ids is None:
+            lines, _ = self._schema_lines(schema)
+            schema_trunc = "\n".join(lines[: key[1]])
+            ids = torch.tensor(self.tokenizer(schema_trunc, add_special_tokens=False).input_ids, dtype=torch.long)
 
-        return "\n".join(kept)
+            if len(self._schema_ids_cache) >= SCHEMA_CACHE_SIZE:
+                self._schema_ids_cache.clear()
+            self._schema_ids_cache[key] = ids
+        return ids
 
-    def _make_inputs_under_limit(self, schema: str, question: str, max_new_tokens: int):
+    def _prompt_ids(self, schema: str, question: str, max_new_tokens: int) -> tuple[torch.Tensor, torch.Tensor]:
+        """
+        Prompt token ids split as (prefix + truncated schema, mid + question + suffix),
+        both 1-D CPU long tensors. The head depends only on the schema and how many
+        of its lines fit, so its KV cache can be shared across questions.
+        """
         budget = self.max_ctx - max_new_tokens
         if budget <= 0:
             raise ValueError(f"max_new_tokens={max_new_tokens} leaves no room for prompt in ctx={self.max_ctx}")
@@ -70,49 +197,115 @@ class GPT2XLAgent:
 
         schema_budget = max(0, budget - fixed_len)
 
-        # Truncate schema safely by lines
-        schema_trunc = self._truncate_schema_by_lines(schema, schema_budget)
-        schema_ids = self.tokenizer(schema_trunc, add_special_tokens=False).input_ids
+        # Truncate schema safely by lines (cached across questions on the same schema)
+        schema_ids = self._schema_ids(schema, schema_budget)
+
+        question_t = torch.tensor(question_ids, dtype=torch.long)
+        return torch.cat([self._prefix_t, schema_ids]), torch.cat([self._mid_t, question_t, self._suffix_t])
+
+    def _build_input_ids(self, schema: str, question: str, max_new_tokens: int) -> torch.Tensor:
+        """Prompt token ids as a 1-D CPU long tensor (schema truncated to fit the context)."""
+        return torch.cat(self._prompt_ids(schema, question, max_new_tokens))
 
-        input_ids = self._prefix_ids + schema_ids + self._mid_ids + question_ids + self._suffix_ids
-        attn = [1] * len(input_ids)
+    def _schema_kv(self, schema: str, head: torch.Tensor):
+        """past_key_values of the prompt head; re-prefilled whenever (schema, head length) changes."""
+        # Fewer kept lines always means fewer tokens, so the length identifies the truncation
+        key = (schema, len(head))
+        if self._schema_kv_slot is None or self._schema_kv_slot[0] != key:
+            # Drop the old head first so two KV caches are never resident at once
+            self._schema_kv_slot = None
+            with torch.inference_mode():
+                kv = self.model(input_ids=self._to_device(head.unsqueeze(0)), use_cache=True).past_key_values
+            self._schema_kv_slot = (key, kv)
+        return self._schema_kv_slot[1]
+
+    def _to_device(self, t: torch.Tensor) -> torch.Tensor:
+        # Prompts are a few hundred ids: a plain synchronous copy is cheaper than
+        # allocating page-locked memory for each one
+        return t.to(self.device)
+
+    def _make_inputs_under_limit(self, schema: str, question: str, max_new_tokens: int):
+        input_ids = self._build_input_ids(schema, question, max_new_tokens).unsqueeze(0)
 
         return {
-            "input_ids": torch.tensor([input_ids], device=self.device),
-            "attention_mask": torch.tensor([attn], device=self.device),
-            "input_len": len(input_ids),  # for slicing generated part
+            "input_ids": self._to_device(input_ids),
+            "attention_mask": self._to_device(torch.ones_like(input_ids)),
+            "input_len": input_ids.shape[1],  # for slicing generated part
         }
 
     def generate_sql(self, schema: str, question: str, max_new_tokens: int = 64) -> str:
-        inputs = self._make_inputs_under_limit(schema, question, max_new_tokens=max_new_tokens)
-        input_len = inputs.pop("input_len")
+        """
+        Single prompt: only the question part is prefilled, on top of the cached
+        KV of the schema head (see _schema_kv).
+        """
+        head, tail = self._prompt_ids(schema, question, max_new_tokens)
+        past_key_values = self._schema_kv(schema, head)
+
+        input_ids = self._to_device(torch.cat([head, tail]).unsqueeze(0))
+        return self._generate(
+            {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)},
+            max_new_tokens,
+            past_key_values=past_key_values,
+        )[0]
+
+    def generate_sql_batch(self, schemas: list[str], questions: list[str], max_new_tokens: int = 64) -> list[str]:
+        """
+        Generate SQL for several (schema, question) pairs with one model.generate call.
+        Prompts are left-padded so every row's continuation starts at the same offset.
+        """
+        rows = [self._build_input_ids(sc, q, max_new_tokens) for sc, q in zip(schemas, questions)]
+        input_len = max(len(r) for r in rows)
 
-        with torch.no_grad():
+        # Left-pad into one CPU tensor, then a single host-to-device copy
+        input_ids = torch.full((len(rows), input_len), self.tokenizer.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(rows), input_len), dtype=torch.long)
+        for i, r in enumerate(rows):
+            input_ids[i, input_len - len(r):] = r
+            attention_mask[i, input_len - len(r):] = 1
+        inputs = {"input_ids": self._to_device(input_ids), "attention_mask": self._to_device(attention_mask)}
+        return self._generate(inputs, max_new_tokens)
+
+    def _generate(self, inputs: dict, max_new_tokens: int, past_key_values=None) -> list[str]:
+        """
+        model.generate on (input_ids, attention_mask), then one extracted SQL per row.
+        past_key_values: cached KV of a prompt head; generate works on a copy of it.
+        """
+        input_len = inputs["input_ids"].shape[1]
+
+        with torch.inference_mode():
+            if past_key_values is not None:
+                # generate appends to the cache, so work on a copy (made in inference mode,
+                # like the cache itself)
+                inputs = {**inputs, "past_key_values": copy.deepcopy(past_key_values), "use_cache": True}
             out = self.model.generate(
                 **inputs,
                 max_new_tokens=max_new_tokens,
                 do_sample=False,
                 pad_token_id=self.tokenizer.eos_token_id,
                 eos_token_id=self.tokenizer.eos_token_id,
-                no_repeat_ngram_size=3,  # reduces degeneracy a bit
+                logits_processor=LogitsProcessorList([IncrementalNoRepeatNGram(NO_REPEAT_NGRAM_SIZE)]),
+                stopping_criteria=StoppingCriteriaList([StopOnTokenIds(self._semicolon_ids)]),
             )
 
-        # Decode ONLY generated continuation
-        gen_ids = out[0][input_len:]
-        gen_text = self.tokenizer.decode(gen_ids, skip_special_tokens=True)
+        # Decode ONLY generated continuations
+        gen_texts = self.tokenizer.batch_decode(out[:, input_len:], skip_special_tokens=True)
+
+        sqls = []
+        for gen_text in gen_texts:
+            # Since prompt already ends with "SELECT ", reconstruct full SQL candidate
+            candidate = "SELECT " + gen_text
 
-        # Since prompt already ends with "SELECT ", reconstruct full SQL candidate
-        candidate = "SELECT " + gen_text
+            sql = self._extract_sql(candidate)
 
-        sql = self._extract_sql(candidate)
+            if self.debug:
+                print("=== CANDIDATE ===")
+                print(candidate)
+                print("=== EXTRACTED ===")
+                print(sql)
 
-        if self.debug:
-            print("=== CANDIDATE ===")
-            print(candidate)
-            print("=== EXTRACTED ===")
-            print(sql)
+            sqls.append(sql.strip())
 
-        return sql.strip()
+        return sqls
 
     @staticmethod
     def _extract_sql(text: str) -> str:
@@ -1,37 +1,107 @@
+import copy
 import torch
 import re
 from transformers import AutoTokenizer, AutoModelForCausalLM
 
 MODEL_ID = "Qwen/Qwen2.5-Coder-1.5B-Instruct"
 
+# ```sql ... ``` block στην έξοδο του μοντέλου
+_CODE_BLOCK_RE = re.compile(r"```(?:sql)?\s*(.*?)\s*```", re.DOTALL | re.IGNORECASE)
+
 class QwenAgent:
-    def __init__(self):
+    def __init__(self, compile_model: bool = False):
         print(f"⏳ Loading {MODEL_ID} locally... (this might take a minute)")
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+
+        # GPU: bf16/fp16 + SDPA attention, CPU: fp32
+        if self.device == "cuda":
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            attn_impl = "sdpa"
+        else:
+            dtype = torch.float32
+            attn_impl = None
         
         self.tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
+        self.tokenizer.padding_side = "left"  # για batched generate
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
         self.model = AutoModelForCausalLM.from_pretrained(
             MODEL_ID,
-            torch_dtype=torch.float32, 
+            torch_dtype=dtype,
+            attn_implementation=attn_impl,
             device_map=self.device
         )
         self.model.eval()
+
+        # Προαιρετικό torch.compile του forward που καλεί το generate
+        if compile_model:
+            self.model.forward = torch.compile(self.model.forward, mode="reduce-overhead", fullgraph=False)
+
+        # (schema, prefix ids, past_key_values) του schema prefix, βλ. prime_schema
+        self._schema_kv = None
         print(f"✅ Model loaded on {self.device.upper()}")
 
-    # Επιστρέφει tuple: (sql, prompt_tokens, completion_tokens)
-    def generate_sql(self, schema: str, question: str, max_new_tokens: int = 256) -> tuple[str, int, int]:
-        prompt = (
-            f"### Database schema:\n{schema}\n\n"
+    @staticmethod
+    def _schema_prefix(schema: str) -> str:
+        return f"### Database schema:\n{schema}\n\n"
+
+    @staticmethod
+    def _question_suffix(question: str) -> str:
+        return (
             f"### Question:\n{question}\n\n"
             f"### SQL:\n"
         )
+
+    @classmethod
+    def _build_prompt(cls, schema: str, question: str) -> str:
+        return cls._schema_prefix(schema) + cls._question_suffix(question)
+
+    # Κάνει prefill του schema prefix μία φορά και κρατά το KV cache του.
+    # Τα επόμενα generate_sql στο ίδιο schema κάνουν prefill μόνο το question+suffix.
+    def prime_schema(self, schema: str) -> None:
+        prefix_ids = self.tokenizer(self._schema_prefix(schema), return_tensors="pt").input_ids.to(self.device)
+        with torch.inference_mode():
+            out = self.model(input_ids=prefix_ids, use_cache=True)
+        self._schema_kv = (schema, prefix_ids, out.past_key_values)
+
+    # Επιστρέφει tuple: (sql, prompt_tokens, completion_tokens)
+    def generate_sql(self, schema: str, question: str, max_new_tokens: int = 256) -> tuple[str, int, int]:
+        if self._schema_kv is None:
+            return self.generate_sql_batch([schema], [question], max_new_tokens=max_new_tokens)[0]
+
+        # Αλλαγή schema -> νέο prefill του prefix
+        if self._schema_kv[0] != schema:
+            self.prime_schema(schema)
+        _, prefix_ids, past_key_values = self._schema_kv
+
+        suffix_ids = self.tokenizer(self._question_suffix(question), return_tensors="pt").input_ids.to(self.device)
+        input_ids = torch.cat([prefix_ids, suffix_ids], dim=1)
+        input_len = input_ids.shape[1]
+
+        with torch.inference_mode():
+            generated_ids = self.model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                # Το generate γράφει στο cache, οπότε δουλεύουμε σε αντίγραφο
+                past_key_values=copy.deepcopy(past_key_values),
+                use_cache=True,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=self.tokenizer.eos_token_id,
+                eos_token_id=self.tokenizer.eos_token_id
+            )
+
+        return self._pack_result(generated_ids[0], input_len, self._build_prompt(schema, question), input_len)
+
+    # Batch εκδοχή: ένα model.generate για όλες τις ερωτήσεις (left padding)
+    # Επιστρέφει λίστα από tuples (sql, prompt_tokens, completion_tokens)
+    def generate_sql_batch(self, schemas: list[str], questions: list[str], max_new_tokens: int = 256) -> list[tuple[str, int, int]]:
+        prompts = [self._build_prompt(sc, q) for sc, q in zip(schemas, questions)]
         
-        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
-        
-        # 1. Υπολογισμός Prompt Tokens
-        prompt_tokens = inputs.input_ids.shape[1]
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.device)
+        input_len = inputs.input_ids.shape[1]
         
-        with torch.no_grad():
+        with torch.inference_mode():
             generated_ids = self.model.generate(
                 **inputs,
                 max_new_tokens=max_new_tokens,
@@ -39,20 +109,33 @@ class QwenAgent:
                 pad_token_id=self.tokenizer.eos_token_id,
                 eos_token_id=self.tokenizer.eos_token_id
             )
-            
-        # 2. Υπολογισμός Completion Tokens (Generated only)
-        # Αφαιρούμε το μήκος του prompt από το συνολικό μήκος
-        completion_tokens = generated_ids.shape[1] - prompt_tokens
-            
-        output_text = self.tokenizer.decode(generated_ids[0], skip_special_tokens=True)
-        
+
+        results = []
+        for i, prompt in enumerate(prompts):
+            # Prompt Tokens χωρίς το padding
+            prompt_tokens = int(inputs.attention_mask[i].sum())
+            results.append(self._pack_result(generated_ids[i], input_len, prompt, prompt_tokens))
+
+        return results
+
+    def _pack_result(self, row, input_len: int, prompt: str, prompt_tokens: int) -> tuple[str, int, int]:
+        # Completion Tokens (Generated only): μέχρι και το πρώτο EOS
+        eos_id = self.tokenizer.eos_token_id
+        gen = row[input_len:].tolist()
+        completion_tokens = gen.index(eos_id) + 1 if eos_id in gen else len(gen)
+
+        output_text = self.tokenizer.decode(row, skip_special_tokens=True)
+        return self._clean_output(output_text, prompt), prompt_tokens, completion_tokens
+
+    @staticmethod
+    def _clean_output(output_text: str, prompt: str) -> str:
         # --- CLEANING ---
         if "### SQL:" in output_text:
             raw_answer = output_text.split("### SQL:")[-1].strip()
         else:
             raw_answer = output_text.replace(prompt, "").strip()
 
-        code_block_match = re.search(r"```(?:sql)?\s*(.*?)\s*```", raw_answer, re.DOTALL | re.IGNORECASE)
+        code_block_match = _CODE_BLOCK_RE.search(raw_answer)
         if code_block_match:
             sql = code_block_match.group(1).strip()
         else:
@@ -63,5 +146,4 @@ class QwenAgent:
             
         sql = sql.replace("```", "").strip()
         
-        # Επιστροφή 3 τιμών
-        return sql, prompt_tokens, completion_tokens
\ No newline at end of file
+        return sql
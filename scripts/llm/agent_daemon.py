@@ -0,0 +1,130 @@
+"""
+scripts/llm/agent_daemon.py
+
+Keep one GPT-2 XL or Qwen agent loaded and serve generate_sql over HTTP, so the
+one-query scripts don't cold-load the model (disk read + CUDA init) on every run.
+
+Usage:
+  # Terminal 1: load once
+  python -m scripts.llm.agent_daemon --model qwen --port 8787
+
+  # Terminal 2: thin clients
+  AGENT_DAEMON_URL=http://127.0.0.1:8787 python -m scripts.llm.qwen_one_query_run
+
+API:
+  POST /generate  {"schema": str, "question": str, "max_new_tokens": int (optional)}
+    -> {"model": "gpt2xl", "sql": str}
+    -> {"model": "qwen", "sql": str, "prompt_tokens": int, "completion_tokens": int}
+
+Requests are served one at a time (a single model instance is not safe to
+generate from concurrently). The agent keeps its own schema caches between calls.
+The Qwen agent is primed with the first request's schema; after that its
+generate_sql re-primes the schema KV cache whenever the schema changes.
+"""
+
+import argparse
+import json
+import os
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import requests
+
+DEFAULT_PORT = 8787
+
+
+def remote_generate_sql(schema: str, question: str, max_new_tokens: int | None = None, url: str | None = None):
+    """
+    Client side: same return value as the daemon's agent.generate_sql
+    (str for GPT-2 XL, (sql, prompt_tokens, completion_tokens) for Qwen).
+    url defaults to $AGENT_DAEMON_URL.
+    """
+    url = url or os.environ["AGENT_DAEMON_URL"]
+    payload = {"schema": schema, "question": question}
+    if max_new_tokens is not None:
+        payload["max_new_tokens"] = max_new_tokens
+
+    resp = requests.post(f"{url.rstrip('/')}/generate", json=payload, timeout=600)
+    resp.raise_for_status()
+    out = resp.json()
+
+    if "prompt_tokens" in out:
+        return out["sql"], out["prompt_tokens"], out["completion_tokens"]
+    return out["sql"]
+
+
+def load_agent(model: str):
+    if model == "qwen":
+        from models.qwen_agent import QwenAgent
+        return QwenAgent()
+
+    from models.gpt2xl_agent import GPT2XLAgent
+    return GPT2XLAgent()
+
+
+def make_handler(agent, model: str):
+    # QwenAgent.generate_sql only reuses (and re-primes) the schema KV cache once primed
+    needs_prime = [model == "qwen"]
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            if self.path.rstrip("/") != "/generate":
+                self._reply(404, {"error": f"Unknown path: {self.path}"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                req = json.loads(self.rfile.read(length) or b"{}")
+                kwargs = {}
+                if req.get("max_new_tokens") is not None:
+                    kwargs["max_new_tokens"] = int(req["max_new_tokens"])
+
+                schema = str(req.get("schema", ""))
+                if needs_prime[0]:
+                    agent.prime_schema(schema)
+                    needs_prime[0] = False
+
+                out = agent.generate_sql(schema, str(req.get("question", "")), **kwargs)
+            except Exception as e:
+                self._reply(500, {"error": str(e)})
+                return
+
+            if isinstance(out, tuple):
+                sql, prompt_tokens, completion_tokens = out
+                self._reply(200, {"model": model, "sql": sql,
+                                  "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens})
+            else:
+                self._reply(200, {"model": model, "sql": out})
+
+    return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve a preloaded Text2SQL agent over HTTP.")
+    parser.add_argument("--model", choices=["gpt2xl", "qwen"], default="gpt2xl", help="Agent to preload")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    args = parser.parse_args()
+
+    agent = load_agent(args.model)
+    server = HTTPServer((args.host, args.port), make_handler(agent, args.model))
+    print(f"🚀 {args.model} agent serving on http://{args.host}:{args.port}/generate")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
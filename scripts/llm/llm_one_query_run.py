@@ -1,10 +1,10 @@
+import os
 import sys
 from pathlib import Path
 
 # Add project root
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from models.gpt2xl_agent import GPT2XLAgent
 from database.db_manager import DatabaseManager
 
 def main():
@@ -15,9 +15,14 @@ def main():
     schema = db.get_compact_schema("advising", question=question, max_tables=10)
     print(schema)
     
-    # 3) Generate SQL
-    agent = GPT2XLAgent()
-    sql = agent.generate_sql(schema, question, max_new_tokens=80)
+    # 3) Generate SQL (preloaded agent_daemon if AGENT_DAEMON_URL is set)
+    if os.environ.get("AGENT_DAEMON_URL"):
+        from scripts.llm.agent_daemon import remote_generate_sql
+        sql = remote_generate_sql(schema, question, max_new_tokens=80)
+    else:
+        from models.gpt2xl_agent import GPT2XLAgent
+        agent = GPT2XLAgent()
+        sql = agent.generate_sql(schema, question, max_new_tokens=80)
 
     print("\nQuestion:")
     print(question)
@@ -1,19 +1,21 @@
 import argparse
-import json
 import sys
 from pathlib import Path
 from typing import Any, Dict, List
 import time
 
+import orjson
+
 # Add project root to sys.path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from models.gpt2xl_agent import GPT2XLAgent
 from database.db_manager import DatabaseManager
+from scripts.sql_utils import whole_token_pattern
 
 
 def load_dataset(path: Path) -> List[dict]:
-    data = json.loads(path.read_text(encoding="utf-8"))
+    data = orjson.loads(path.read_bytes())  # parses UTF-8 bytes directly
     if not isinstance(data, list):
         raise ValueError(f"Dataset JSON must be a list, got: {type(data)}")
     return data
@@ -33,20 +35,16 @@ def fill_question_text(question_text: str, variables: Dict[str, Any]) -> str:
     Replace bare variable tokens (e.g., airport_code0) with their values.
     No quoting, no escaping.
     """
-    import re
-
-    filled = question_text
-    if not variables:
-        return filled
-
-    for k in sorted(variables.keys(), key=len, reverse=True):
-        v = variables[k]
-        if v is None:
-            continue
-        pattern = re.compile(rf"(?<![A-Za-z0-9_]){re.escape(str(k))}(?![A-Za-z0-9_])")
-        filled = pattern.sub(str(v), filled)
+    # Keys that are not substrings of the question cannot match: no regex at all without any
+    values = {
+        str(k): str(v)
+        for k, v in (variables or {}).items()
+        if v is not None and str(k) in question_text
+    }
+    if not values:
+        return question_text
 
-    return filled
+    return whole_token_pattern(tuple(values)).sub(lambda m: values[m.group(0)], question_text)
 
 
 def main():
@@ -76,6 +74,17 @@ def main():
         default=64,
         help="Max tokens to generate for SQL.",
     )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="torch.compile the model forward (pays off over many generations).",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=8,
+        help="Questions per generate call (left-padded batch, default: 8).",
+    )
     parser.add_argument(
         "--limit",
         type=int,
@@ -97,7 +106,7 @@ def main():
     dataset_name = dataset_path.stem  # DB name convention
     data = load_dataset(dataset_path)
 
-    agent = GPT2XLAgent()
+    agent = GPT2XLAgent(compile_model=args.compile)
 
     # Use DB manager only for compact schema construction (same as benchmark)
     db = DatabaseManager(args.rdbms)
@@ -109,14 +118,46 @@ def main():
     print(f"Max tables: {args.max_tables}")
     print(f"Max new tokens: {args.max_new_tokens}")
     print(f"Limit (questions): {args.limit}")
+    print(f"Batch size: {args.batch_size}")
     print(f"Starting entry index: {args.entry_idx}")
     print("=" * 80)
 
     n_done = 0
+    pending = []  # (question_text, question_filled, variables, schema_compact)
+
+    def flush():
+        nonlocal n_done
+        if not pending:
+            return
+
+        t0 = time.time()
+        pred_sqls = agent.generate_sql_batch(
+            [p[3] for p in pending],
+            [p[1] for p in pending],
+            max_new_tokens=args.max_new_tokens,
+        )
+        t1 = time.time()
+
+        for (question_text, question_filled, variables, schema_compact), pred_sql in zip(pending, pred_sqls):
+            print("\n" + "-" * 80)
+            print(f"Question #{n_done}")
+            print(f"question_text:        {question_text}")
+            print(f"question_text_filled: {question_filled}")
+            print(f"variables:            {variables}")
+            print("\nSchema (compact):")
+            print(schema_compact)
+            print("\nPredicted SQL:")
+            print(pred_sql)
+            print(f"\n(Time taken: {(t1 - t0) / len(pending):.2f} seconds, batch of {len(pending)})")
+            print("-" * 80)
 
+            n_done += 1
+        pending.clear()
+
+    n_queued = 0
     for entry in data[args.entry_idx :]:
         for sentence in iter_sentences(entry):
-            if n_done >= args.limit:
+            if n_queued >= args.limit:
                 break
 
             question_text = str(sentence.get("text", ""))
@@ -130,32 +171,16 @@ def main():
                 question=question_filled,
                 max_tables=args.max_tables,
             )
-            print("\n" + "-" * 80)
-            print(f"Question #{n_done}")
-            print(f"question_text:        {question_text}")
-            print(f"question_text_filled: {question_filled}")
-            print(f"variables:            {variables}")
-            print("\nSchema (compact):")
-            print(schema_compact)
-            print("\nPredicted SQL:")
-
-            t0 = time.time()
-            pred_sql = agent.generate_sql(
-                schema=schema_compact,
-                question=question_filled,
-                max_new_tokens=args.max_new_tokens,
-            )
-            t1 = time.time()
+            pending.append((question_text, question_filled, variables, schema_compact))
+            n_queued += 1
 
-            print(pred_sql)
-            print(f"\n(Time taken: {t1 - t0:.2f} seconds)")
-            print("-" * 80)
-
-            n_done += 1
+            if len(pending) >= max(1, args.batch_size):
+                flush()
 
-        if n_done >= args.limit:
+        if n_queued >= args.limit:
             break
 
+    flush()
     db.close()
     print(f"\nDone. Produced {n_done} predictions.")
 
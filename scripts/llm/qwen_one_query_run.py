@@ -1,8 +1,8 @@
+import os
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from models.qwen_agent import QwenAgent
 from database.db_manager import DatabaseManager
 
 DB_NAME = "advising"
@@ -13,11 +13,18 @@ def main():
     db = DatabaseManager("mysql", DB_NAME)
     schema = db.get_compact_schema(DB_NAME, question=QUESTION)
     
-    print("2. initializing Agent...")
-    agent = QwenAgent()
-    
-    print("3. Generating SQL...")
-    sql = agent.generate_sql(schema, QUESTION)
+    # Preloaded agent_daemon if AGENT_DAEMON_URL is set
+    if os.environ.get("AGENT_DAEMON_URL"):
+        from scripts.llm.agent_daemon import remote_generate_sql
+        print("3. Generating SQL (agent daemon)...")
+        sql = remote_generate_sql(schema, QUESTION)
+    else:
+        from models.qwen_agent import QwenAgent
+        print("2. initializing Agent...")
+        agent = QwenAgent()
+
+        print("3. Generating SQL...")
+        sql = agent.generate_sql(schema, QUESTION)
     
     print("\n" + "="*40)
     print(f"QUESTION: {QUESTION}")
@@ -1,20 +1,27 @@
+import os
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from models.qwen_agent import QwenAgent
 
 def main():
     print("Testing Local Qwen Agent...")
     
-    # This triggers the download/load of the model
-    agent = QwenAgent()
-    
     schema = "Tables: student(id, name)"
     question = "List all students"
-    
-    print(f"\nPrompting with: '{question}'...")
-    sql = agent.generate_sql(schema, question)
+
+    if os.environ.get("AGENT_DAEMON_URL"):
+        # Model already loaded by scripts/llm/agent_daemon.py
+        from scripts.llm.agent_daemon import remote_generate_sql
+        print(f"\nPrompting with: '{question}'...")
+        sql = remote_generate_sql(schema, question)
+    else:
+        from models.qwen_agent import QwenAgent
+        # This triggers the download/load of the model
+        agent = QwenAgent()
+
+        print(f"\nPrompting with: '{question}'...")
+        sql = agent.generate_sql(schema, question)
     
     print(f"\nOutput:\n{sql}")
 
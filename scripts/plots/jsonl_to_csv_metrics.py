@@ -34,12 +34,17 @@ from __future__ import annotations
 
 import argparse
 import csv
+import itertools
 import json
 import math
+import operator
 import re
+import sys
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional
 
+import orjson
+
 
 # -----------------------------
 # Helpers: parsing / flattening
@@ -68,6 +73,11 @@ def _to_bool_or_none(x) -> Optional[bool]:
     return None
 
 
+# "table_name(" at the start of a line, leading blanks allowed; [^\S\n] keeps the
+# whitespace from running across lines (same as the old per-line strip + match).
+_TABLE_RE = re.compile(r"(?m)^[^\S\n]*([A-Za-z0-9_]+)[^\S\n]*\(")
+
+
 def _parse_schema_compact(schema_compact: str) -> List[str]:
     """
     schema_compact example lines:
@@ -77,16 +87,11 @@ def _parse_schema_compact(schema_compact: str) -> List[str]:
     """
     if not schema_compact:
         return []
-    tables = []
-    for line in schema_compact.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        # table_name(...) pattern
-        m = re.match(r"^([A-Za-z0-9_]+)\s*\(", line)
-        if m:
-            tables.append(m.group(1))
-    return tables
+    return _TABLE_RE.findall(schema_compact)
+
+
+# Whole-word keywords only, so identifiers/literals like SELECTED or 'joiner' don't count
+_JOIN_SELECT_RE = re.compile(r"\b(JOIN|SELECT)\b")
 
 
 def _infer_sql_complexity(sql: str) -> str:
@@ -98,9 +103,9 @@ def _infer_sql_complexity(sql: str) -> str:
     """
     if not sql:
         return "unknown"
-    s = sql.upper()
-    join_count = s.count("JOIN")
-    subquery_count = max(0, s.count("SELECT") - 1)
+    keywords = _JOIN_SELECT_RE.findall(sql.upper())  # one scan for both counts
+    join_count = keywords.count("JOIN")
+    subquery_count = max(0, keywords.count("SELECT") - 1)
 
     if join_count == 0 and subquery_count == 0:
         return "simple"
@@ -113,7 +118,13 @@ def _quantile(xs: List[float], q: float) -> Optional[float]:
     """Nearest-rank quantile (simple + deterministic)."""
     if not xs:
         return None
-    xs_sorted = sorted(xs)
+    return _quantile_sorted(sorted(xs), q)
+
+
+def _quantile_sorted(xs_sorted: List[float], q: float) -> Optional[float]:
+    """_quantile on an already sorted list (sort once, pick several quantiles)."""
+    if not xs_sorted:
+        return None
     if q <= 0:
         return xs_sorted[0]
     if q >= 1:
@@ -129,10 +140,6 @@ def _mean(xs: List[float]) -> Optional[float]:
     return sum(xs) / len(xs)
 
 
-def _median(xs: List[float]) -> Optional[float]:
-    return _quantile(xs, 0.5)
-
-
 def _count_not_none(xs: List[Any]) -> int:
     return sum(1 for x in xs if x is not None)
 
@@ -142,12 +149,17 @@ def _count_not_none(xs: List[Any]) -> int:
 # -----------------------------
 
 def jsonl_records(path: Path) -> Iterable[dict]:
-    with path.open("r", encoding="utf-8") as f:
+    # orjson parses the raw bytes (surrounding whitespace/newline is fine)
+    with path.open("rb") as f:
         for line in f:
-            line = line.strip()
-            if not line:
+            if not line or line.isspace():
                 continue
-            yield json.loads(line)
+            try:
+                rec = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                # json.dumps writes NaN/Infinity, which orjson rejects
+                rec = json.loads(line)
+            yield rec
 
 
 def to_flat_row(rec: dict) -> dict:
@@ -156,6 +168,9 @@ def to_flat_row(rec: dict) -> dict:
     computed flags for all required metrics.
     """
     dataset = rec.get("dataset", "")
+    if isinstance(dataset, str):
+        # a handful of names repeated across every record (kept per row for summarize)
+        dataset = sys.intern(dataset)
     rid = rec.get("id", None)
 
     query_split = rec.get("query_split", "")
@@ -281,6 +296,37 @@ def to_flat_row(rec: dict) -> dict:
 # Summary aggregation
 # -----------------------------
 
+# The to_flat_row fields summarize() reads (no SQL / question strings)
+SUMMARY_KEYS = (
+    "dataset", "complexity_bucket", "tables_in_schema_compact", "gen_time_s",
+    "mysql_pred_success", "mariadb_pred_success",
+    "mysql_pred_execution_time_s", "mariadb_pred_execution_time_s",
+    "mysql_ex", "mariadb_ex", "mysql_ex_given_success", "mariadb_ex_given_success",
+    "mysql_vs_mariadb_match",
+    "pred_mysql_only_success", "pred_mariadb_only_success", "pred_both_success", "pred_neither_success",
+)
+
+
+_get_summary_keys = operator.itemgetter(*SUMMARY_KEYS)
+
+
+def _columns(rows: List[dict]) -> Dict[str, tuple]:
+    """
+    Transpose rows into one tuple per SUMMARY_KEYS field (zip does it in C),
+    so the counters below are tuple.count calls instead of Python loops.
+    Flags hold True/False/None only, so count(True) == number of `is True`.
+    """
+    return dict(zip(SUMMARY_KEYS, zip(*map(_get_summary_keys, rows))))
+
+
+def _count_true(values: tuple, mask: List[bool]) -> int:
+    return list(itertools.compress(values, mask)).count(True)
+
+
+def _non_null_floats(xs: Iterable[Any]) -> List[float]:
+    return [float(x) for x in xs if x is not None]
+
+
 def summarize(rows: List[dict]) -> List[dict]:
     """
     Produce per-dataset summary rows with rates + timing stats,
@@ -295,51 +341,51 @@ def summarize(rows: List[dict]) -> List[dict]:
 
     for dataset, ds_rows in sorted(by_dataset.items()):
         n = len(ds_rows)
+        cols = _columns(ds_rows)
 
         # success counts (pred)
-        mysql_pred_succ = sum(1 for r in ds_rows if r["mysql_pred_success"] is True)
-        maria_pred_succ = sum(1 for r in ds_rows if r["mariadb_pred_success"] is True)
+        mysql_pred_succ = cols["mysql_pred_success"].count(True)
+        maria_pred_succ = cols["mariadb_pred_success"].count(True)
 
         # EX counts
-        mysql_ex_true = sum(1 for r in ds_rows if r["mysql_ex"] is True)
-        maria_ex_true = sum(1 for r in ds_rows if r["mariadb_ex"] is True)
+        mysql_ex_true = cols["mysql_ex"].count(True)
+        maria_ex_true = cols["mariadb_ex"].count(True)
 
         # EX | success denom excludes None
-        mysql_ex_given_success_vals = [r["mysql_ex_given_success"] for r in ds_rows]
-        maria_ex_given_success_vals = [r["mariadb_ex_given_success"] for r in ds_rows]
+        mysql_ex_given_success_vals = cols["mysql_ex_given_success"]
+        maria_ex_given_success_vals = cols["mariadb_ex_given_success"]
 
-        mysql_ex_gs_denom = sum(1 for x in mysql_ex_given_success_vals if x in (True, False))
-        maria_ex_gs_denom = sum(1 for x in maria_ex_given_success_vals if x in (True, False))
+        mysql_ex_gs_true = mysql_ex_given_success_vals.count(True)
+        maria_ex_gs_true = maria_ex_given_success_vals.count(True)
 
-        mysql_ex_gs_true = sum(1 for x in mysql_ex_given_success_vals if x is True)
-        maria_ex_gs_true = sum(1 for x in maria_ex_given_success_vals if x is True)
+        mysql_ex_gs_denom = mysql_ex_gs_true + mysql_ex_given_success_vals.count(False)
+        maria_ex_gs_denom = maria_ex_gs_true + maria_ex_given_success_vals.count(False)
 
         # Cross-RDBMS agreement among both-success where match is comparable
-        match_vals = [r["mysql_vs_mariadb_match"] for r in ds_rows if r["pred_both_success"]]
-        match_denom = sum(1 for x in match_vals if x in (True, False))
-        match_true = sum(1 for x in match_vals if x is True)
+        match_vals = list(itertools.compress(cols["mysql_vs_mariadb_match"], cols["pred_both_success"]))
+        match_true = match_vals.count(True)
+        match_denom = match_true + match_vals.count(False)
 
         # Asymmetry
-        mysql_only = sum(1 for r in ds_rows if r["pred_mysql_only_success"])
-        maria_only = sum(1 for r in ds_rows if r["pred_mariadb_only_success"])
-        both = sum(1 for r in ds_rows if r["pred_both_success"])
-        neither = sum(1 for r in ds_rows if r["pred_neither_success"])
+        mysql_only = cols["pred_mysql_only_success"].count(True)
+        maria_only = cols["pred_mariadb_only_success"].count(True)
+        both = cols["pred_both_success"].count(True)
+        neither = cols["pred_neither_success"].count(True)
 
         # Timings
-        gen_times = [float(r["gen_time_s"]) for r in ds_rows if r["gen_time_s"] is not None]
-        mysql_exec_times = [
-            float(r["mysql_pred_execution_time_s"])
-            for r in ds_rows
-            if r["mysql_pred_execution_time_s"] is not None
-        ]
-        maria_exec_times = [
-            float(r["mariadb_pred_execution_time_s"])
-            for r in ds_rows
-            if r["mariadb_pred_execution_time_s"] is not None
-        ]
+        gen_times = _non_null_floats(cols["gen_time_s"])
+        mysql_exec_times = _non_null_floats(cols["mysql_pred_execution_time_s"])
+        maria_exec_times = _non_null_floats(cols["mariadb_pred_execution_time_s"])
 
         # Schema size
-        schema_sizes = [int(r["tables_in_schema_compact"]) for r in ds_rows if r["tables_in_schema_compact"] is not None]
+        schema_sizes = _non_null_floats(cols["tables_in_schema_compact"])
+
+        # Sort each list once; medians/quantiles below pick from the sorted copies
+        # (means stay on the original order so the float sums are unchanged).
+        gen_sorted = sorted(gen_times)
+        mysql_exec_sorted = sorted(mysql_exec_times)
+        maria_exec_sorted = sorted(maria_exec_times)
+        schema_sorted = sorted(schema_sizes)
 
         base = {
             "dataset": dataset,
@@ -368,37 +414,38 @@ def summarize(rows: List[dict]) -> List[dict]:
 
             # 6) Generation time stats
             "gen_time_mean_s": _mean(gen_times),
-            "gen_time_median_s": _median(gen_times),
-            "gen_time_p90_s": _quantile(gen_times, 0.90),
+            "gen_time_median_s": _quantile_sorted(gen_sorted, 0.5),
+            "gen_time_p90_s": _quantile_sorted(gen_sorted, 0.90),
 
             # 7) Execution time stats
             "mysql_exec_time_mean_s": _mean(mysql_exec_times),
-            "mysql_exec_time_median_s": _median(mysql_exec_times),
+            "mysql_exec_time_median_s": _quantile_sorted(mysql_exec_sorted, 0.5),
             "mariadb_exec_time_mean_s": _mean(maria_exec_times),
-            "mariadb_exec_time_median_s": _median(maria_exec_times),
+            "mariadb_exec_time_median_s": _quantile_sorted(maria_exec_sorted, 0.5),
 
             # 9) Schema size stats (for sensitivity)
-            "schema_tables_mean": _mean([float(x) for x in schema_sizes]) if schema_sizes else None,
-            "schema_tables_median": _median([float(x) for x in schema_sizes]) if schema_sizes else None,
+            "schema_tables_mean": _mean(schema_sizes),
+            "schema_tables_median": _quantile_sorted(schema_sorted, 0.5),
         }
 
         summaries.append(base)
 
         # 8) Complexity breakdown rows (optional but handy)
+        buckets = cols["complexity_bucket"]
         for bucket in ("simple", "medium", "complex", "unknown"):
-            b_rows = [r for r in ds_rows if r["complexity_bucket"] == bucket]
-            if not b_rows:
+            bn = buckets.count(bucket)
+            if not bn:
                 continue
-            bn = len(b_rows)
+            in_bucket = [b == bucket for b in buckets]
             summaries.append({
                 "dataset": dataset,
                 "n_questions": bn,
                 "breakdown": "complexity",
                 "bucket": bucket,
-                "mysql_pred_success_rate": sum(1 for r in b_rows if r["mysql_pred_success"] is True) / bn,
-                "mariadb_pred_success_rate": sum(1 for r in b_rows if r["mariadb_pred_success"] is True) / bn,
-                "mysql_execution_accuracy_ex": sum(1 for r in b_rows if r["mysql_ex"] is True) / bn,
-                "mariadb_execution_accuracy_ex": sum(1 for r in b_rows if r["mariadb_ex"] is True) / bn,
+                "mysql_pred_success_rate": _count_true(cols["mysql_pred_success"], in_bucket) / bn,
+                "mariadb_pred_success_rate": _count_true(cols["mariadb_pred_success"], in_bucket) / bn,
+                "mysql_execution_accuracy_ex": _count_true(cols["mysql_ex"], in_bucket) / bn,
+                "mariadb_execution_accuracy_ex": _count_true(cols["mariadb_ex"], in_bucket) / bn,
             })
 
     return summaries
@@ -415,11 +462,18 @@ def write_csv(path: Path, rows: List[dict]) -> None:
 
     # stable header: union of keys
     keys = sorted({k for r in rows for k in r.keys()})
+    n_keys = len(keys)
+    # Rows holding every key (all to_flat_row rows) go through one C-level
+    # itemgetter; only rows missing keys (summary breakdowns) need the per-key
+    # fallback. Same output as csv.DictWriter with restval="".
+    get_all = operator.itemgetter(*keys)
     with path.open("w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=keys)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
+        w = csv.writer(f)
+        w.writerow(keys)
+        w.writerows(
+            get_all(r) if len(r) == n_keys else [r.get(k, "") for k in keys]
+            for r in rows
+        )
 
 
 # -----------------------------
@@ -460,12 +514,26 @@ def main() -> int:
         else out_csv.with_name(out_csv.stem + "_summary.csv")
     )
 
-    # Build per-question rows
+    # Build per-question rows and write each one as soon as it's built; only the
+    # fields summarize() needs are kept in memory.
     rows: List[dict] = []
-    for rec in jsonl_records(jsonl_path):
-        rows.append(to_flat_row(rec))
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    with out_csv.open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        get_all = None
+        for rec in jsonl_records(jsonl_path):
+            row = to_flat_row(rec)
+            if get_all is None:
+                # same header as write_csv (to_flat_row rows all share one key set)
+                keys = sorted(row)
+                get_all = operator.itemgetter(*keys)
+                w.writerow(keys)
+            w.writerow(get_all(row))
+            rows.append(dict(zip(SUMMARY_KEYS, _get_summary_keys(row))))
 
-    write_csv(out_csv, rows)
+    if not rows:
+        out_csv.unlink()
+        raise ValueError("No rows to write.")
 
     # Build summary rows
     summary_rows = summarize(rows)
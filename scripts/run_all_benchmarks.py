@@ -1,8 +1,12 @@
+import argparse
 import subprocess
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Add project root to path for imports (in-process runs)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 # Λίστα με τα ονόματα των datasets που θέλεις να τρέξεις.
 # Το script υποθέτει ότι τα αρχεία json βρίσκονται στο datasets_source/data/<name>.json
 DATASETS = [
@@ -10,7 +14,60 @@ DATASETS = [
     "atis"#, imdb
 ]
 
+def run_one(db_name, cmd):
+    """Τρέχει το baseline για ένα dataset ως υπο-διεργασία"""
+    print(f"\n▶️ Running benchmark for: {db_name.upper()}")
+    try:
+        # Καλούμε το baseline script ως υπο-διεργασία
+        subprocess.run(cmd, check=True)
+        print(f"✅ Finished {db_name}")
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Failed processing {db_name}. Error code: {e.returncode}")
+    except Exception as e:
+        print(f"❌ Unexpected error on {db_name}: {e}")
+
+def run_in_process(runs):
+    """
+    Τρέχει όλα τα datasets στην ίδια διεργασία: το μοντέλο και η σύνδεση
+    φορτώνονται μία φορά και ξαναχρησιμοποιούνται (όχι reload ανά dataset).
+    """
+    from scripts.run_qwen_baseline import build_parser, run_benchmark
+    from models.qwen_agent import QwenAgent
+    from database.db_manager import DatabaseManager
+
+    parser = build_parser()
+    agent = QwenAgent()
+    db_managers = {}  # ένας DatabaseManager ανά RDBMS
+
+    for db_name, baseline_args in runs:
+        print(f"\n▶️ Running benchmark for: {db_name.upper()}")
+        try:
+            args = parser.parse_args(baseline_args)
+            if args.rdbms not in db_managers:
+                db_managers[args.rdbms] = DatabaseManager(args.rdbms)
+            rc = run_benchmark(args, agent=agent, db_manager=db_managers[args.rdbms])
+            if rc:
+                print(f"❌ Failed processing {db_name}. Error code: {rc}")
+            else:
+                print(f"✅ Finished {db_name}")
+        except Exception as e:
+            print(f"❌ Unexpected error on {db_name}: {e}")
+
+    for db_manager in db_managers.values():
+        db_manager.close()
+
 def main():
+    parser = argparse.ArgumentParser(description="Run the Qwen baseline for every dataset in DATASETS.")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Datasets to run at the same time (default: 1). 1 runs everything in this process with the model "
+             "loaded once; > 1 starts one subprocess per dataset, each loading its own copy of the model, "
+             "so keep this within GPU memory.",
+    )
+    args = parser.parse_args()
+
     # Το μονοπάτι προς το script που ανέβασες
     baseline_script = Path("scripts/run_qwen_baseline.py")
     
@@ -22,6 +79,7 @@ def main():
     print(f"Datasets to run: {', '.join(DATASETS)}")
     print("="*60)
 
+    runs = []
     for db_name in DATASETS:
         dataset_path = f"datasets_source/data/{db_name}.json"
         
@@ -30,30 +88,25 @@ def main():
             print(f"⚠️ Skipping {db_name}: Δεν βρέθηκε το αρχείο {dataset_path}")
             continue
 
-        print(f"\n▶️ Running benchmark for: {db_name.upper()}")
-        
-        # Εντολή: python scripts/run_qwen_baseline.py --dataset ... --limit_entries 50
-        cmd = [
-            sys.executable, str(baseline_script),
+        # Ορίσματα: scripts/run_qwen_baseline.py --dataset ... --limit 50
+        baseline_args = [
             "--dataset", dataset_path,
-            "--limit_entries", "50",   # Τρέχουμε 50 ερωτήσεις για κάθε βάση
-            "--rdbms", "mysql"         # Μπορείς να βάλεις "both" αν θες και MariaDB
+            "--limit", "50",     # Τρέχουμε 50 ερωτήσεις για κάθε βάση
+            "--rdbms", "mysql"   # Μπορείς να βάλεις "mariadb" για MariaDB
         ]
+        runs.append((db_name, baseline_args))
 
-        try:
-            # Καλούμε το baseline script ως υπο-διεργασία
-            subprocess.run(cmd, check=True)
-            print(f"✅ Finished {db_name}")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Failed processing {db_name}. Error code: {e.returncode}")
-        except Exception as e:
-            print(f"❌ Unexpected error on {db_name}: {e}")
-        
-        # Μικρή παύση 2 δευτερολέπτων για να ηρεμήσει ο επεξεργαστής
-        time.sleep(2)
+    if args.jobs <= 1:
+        run_in_process(runs)
+    else:
+        # Με --jobs > 1 τα datasets τρέχουν παράλληλα (κάθε thread περιμένει τη δική του υπο-διεργασία)
+        # και το καθένα τυπώνει το αποτέλεσμά του μόλις ολοκληρωθεί.
+        with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            for db_name, baseline_args in runs:
+                pool.submit(run_one, db_name, [sys.executable, str(baseline_script), *baseline_args])
 
     print("\n" + "="*60)
     print("🎉 Batch Run Complete! Check the 'results' folder.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
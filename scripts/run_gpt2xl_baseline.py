@@ -17,19 +17,22 @@ Required output fields included:
 """
 
 import argparse
-import json
 import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+import orjson
+
 # Add project root to path for imports
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from models.gpt2xl_agent import GPT2XLAgent
 from database.db_manager import DatabaseManager
-from sql_utils import fill_gold_sql, normalize_pred_sql, compare_results, repair_pred_table_names
+from sql_utils import fill_gold_sql, normalize_pred_sql, compare_results, repair_pred_table_names, whole_token_pattern
 
 
 # ----------------------------
@@ -37,7 +40,7 @@ from sql_utils import fill_gold_sql, normalize_pred_sql, compare_results, repair
 # ----------------------------
 
 def load_dataset(path: Path) -> List[dict]:
-    data = json.loads(path.read_text(encoding="utf-8"))
+    data = orjson.loads(path.read_bytes())  # parses UTF-8 bytes directly
     if not isinstance(data, list):
         raise ValueError(f"Dataset JSON must be a list, got: {type(data)}")
     return data
@@ -76,14 +79,21 @@ def get_sentence_variables(sentence: dict) -> Dict[str, Any]:
     return vars_map if isinstance(vars_map, dict) else {}
 
 
+_FROM_CLAUSE = re.compile(
+    r"\bFROM\b(.*?)(\bWHERE\b|\bGROUP\s+BY\b|\bHAVING\b|\bORDER\s+BY\b|\bLIMIT\b|\bUNION\b|\bINTERSECT\b|\bEXCEPT\b|;|$)",
+    re.DOTALL,
+)
+_PARENS = re.compile(r"\([^()]*\)")
+_JOIN = re.compile(r"\bJOIN\b")
+_SELECT = re.compile(r"\bSELECT\b")
+
 def _count_from_sources(sql_upper: str) -> int:
     """
     Count number of table sources in FROM clause:
     - supports implicit joins (comma-separated)
     - supports explicit JOINs
     """
-    m = re.search(r"\bFROM\b(.*?)(\bWHERE\b|\bGROUP\s+BY\b|\bHAVING\b|\bORDER\s+BY\b|\bLIMIT\b|\bUNION\b|\bINTERSECT\b|\bEXCEPT\b|;|$)",
-                  sql_upper, flags=re.DOTALL)
+    m = _FROM_CLAUSE.search(sql_upper)
     if not m:
         return 0
 
@@ -91,7 +101,7 @@ def _count_from_sources(sql_upper: str) -> int:
 
     # Remove anything inside parentheses to avoid counting subquery FROMs as sources here
     # (we already score subqueries separately via SELECT count)
-    from_part_no_parens = re.sub(r"\([^()]*\)", " ", from_part)
+    from_part_no_parens = _PARENS.sub(" ", from_part)
 
     # Implicit joins: tables separated by commas
     comma_sources = 0
@@ -99,7 +109,7 @@ def _count_from_sources(sql_upper: str) -> int:
         comma_sources = from_part_no_parens.count(",") + 1
 
     # Explicit joins: each JOIN introduces another source
-    join_sources = len(re.findall(r"\bJOIN\b", from_part_no_parens))
+    join_sources = len(_JOIN.findall(from_part_no_parens))
 
     # If JOIN syntax is used, sources are typically (1 + #JOIN)
     # If comma syntax is used, sources are (1 + #commas)
@@ -110,7 +120,7 @@ def sql_difficulty_1to4(sql: str) -> int:
     s = sql.upper()
 
     # core complexity signals
-    selects = len(re.findall(r"\bSELECT\b", s))
+    selects = len(_SELECT.findall(s))
     subqueries = max(0, selects - 1)
 
     has_group = "GROUP BY" in s
@@ -177,6 +187,14 @@ def build_identifier_maps(db: DatabaseManager, dataset_name: str):
 
 
 _QUOTED = re.compile(r"('(?:''|[^'])*'|\"(?:\"\"|[^\"])*\")")
+
+@lru_cache(maxsize=None)
+def _table_names_pattern(keys: Tuple[str, ...]) -> "re.Pattern[str]":
+    # One alternation, longest names first (airport_service before airport),
+    # token boundary: not surrounded by [A-Za-z0-9_]
+    alts = "|".join(re.escape(k) for k in sorted(keys, key=len, reverse=True))
+    return re.compile(rf"(?<![A-Za-z0-9_])(?:{alts})(?![A-Za-z0-9_])", re.IGNORECASE)
+
 def normalize_table_case(sql: str, table_map: Dict[str, str]) -> str:
     """
     Replace table names in SQL to match the *actual* case in the DB.
@@ -184,25 +202,18 @@ def normalize_table_case(sql: str, table_map: Dict[str, str]) -> str:
     - avoids changing inside single/double quoted strings.
     - replaces whole tokens only.
     """
-    if not sql:
+    if not sql or not table_map:
         return sql
 
+    # Single pass over each chunk for all tables (match any case in gold/pred)
+    pattern = _table_names_pattern(tuple(table_map))
+
+    def repl(m):
+        return table_map.get(m.group(0).lower(), m.group(0))
+
     parts = _QUOTED.split(sql)  # keeps delimiters
     for i in range(0, len(parts), 2):  # only outside quotes
-        chunk = parts[i]
-
-        # Replace longest names first (airport_service before airport)
-        for key in sorted(table_map.keys(), key=len, reverse=True):
-            actual = table_map[key]
-            # token boundary: not surrounded by [A-Za-z0-9_]
-            chunk = re.sub(
-                rf"(?<![A-Za-z0-9_]){re.escape(key)}(?![A-Za-z0-9_])",
-                actual,
-                chunk,
-                flags=re.IGNORECASE,  # match any case in gold/pred
-            )
-
-        parts[i] = chunk
+        parts[i] = pattern.sub(repl, parts[i])
 
     return "".join(parts)
 
@@ -217,26 +228,25 @@ def fill_question_text(question_text: str, variables: Dict[str, Any]) -> str:
       - Not followed by [A-Za-z0-9_]
     so we don't accidentally replace substrings.
     """
-    filled = question_text
     if not variables:
-        return filled
-
-    # Replace longer keys first to avoid edge cases like var1 vs var10
-    for k in sorted(variables.keys(), key=len, reverse=True):
-        v = variables[k]
-        val = str(v)
+        return question_text
 
-        # Whole-token match for identifiers (letters/digits/underscore)
-        pattern = re.compile(rf"(?<![A-Za-z0-9_]){re.escape(str(k))}(?![A-Za-z0-9_])")
-        filled = pattern.sub(val, filled)
+    # Whole-token match for identifiers (letters/digits/underscore), all keys in one pass;
+    # keys that are not substrings of the question cannot match, so skip the regex without any
+    values = {str(k): str(v) for k, v in variables.items() if str(k) in question_text}
+    if not values:
+        return question_text
 
-    return filled
+    return whole_token_pattern(tuple(values)).sub(lambda m: values[m.group(0)], question_text)
 
 
 # ----------------------------
 # Schema/prompt instrumentation
 # ----------------------------
 
+_SCHEMA_PAREN_LINE = re.compile(r"^([A-Za-z_][\w]*)\s*\((.*)\)\s*$")
+_SCHEMA_COLON_LINE = re.compile(r"^([A-Za-z_][\w]*)\s*:\s*(.*)\s*$")
+
 def parse_schema_counts(schema_compact: str) -> Tuple[int, Optional[int]]:
     """
     Heuristic parsing of compact schema string to estimate:
@@ -254,7 +264,7 @@ def parse_schema_counts(schema_compact: str) -> Tuple[int, Optional[int]]:
 
     for ln in lines:
         # table(col1, col2)
-        m = re.match(r"^([A-Za-z_][\w]*)\s*\((.*)\)\s*$", ln)
+        m = _SCHEMA_PAREN_LINE.match(ln)
         if m:
             t = m.group(1)
             tables.append(t)
@@ -265,7 +275,7 @@ def parse_schema_counts(schema_compact: str) -> Tuple[int, Optional[int]]:
             continue
 
         # table: col1, col2
-        m = re.match(r"^([A-Za-z_][\w]*)\s*:\s*(.*)\s*$", ln)
+        m = _SCHEMA_COLON_LINE.match(ln)
         if m:
             t = m.group(1)
             tables.append(t)
@@ -294,6 +304,37 @@ def count_prompt_tokens_effective(agent: GPT2XLAgent, schema_compact: str, quest
     return int(inputs["input_ids"].shape[1])
 
 
+def generate_for_entry(
+    agent: GPT2XLAgent, items: List[Tuple[str, str]], max_new_tokens: int, batch_size: int = 1
+) -> List[Tuple[str, float]]:
+    """
+    (pred_sql_raw, gen_time_s) for each (schema_compact, question) in items.
+
+    batch_size > 1 sends up to that many prompts through one generate call;
+    every row of a batch gets the batch wall time divided by its size.
+    Timed with the monotonic perf_counter_ns (no clock jumps, integer ns).
+    """
+    results: List[Tuple[str, float]] = []
+    if batch_size <= 1:
+        for schema_compact, question in items:
+            t0 = time.perf_counter_ns()
+            sql = agent.generate_sql(schema=schema_compact, question=question, max_new_tokens=max_new_tokens)
+            results.append((sql, (time.perf_counter_ns() - t0) / 1e9))
+        return results
+
+    for start in range(0, len(items), batch_size):
+        chunk = items[start:start + batch_size]
+        t0 = time.perf_counter_ns()
+        sqls = agent.generate_sql_batch(
+            [schema_compact for schema_compact, _ in chunk],
+            [question for _, question in chunk],
+            max_new_tokens=max_new_tokens,
+        )
+        per_row = (time.perf_counter_ns() - t0) / 1e9 / len(chunk)
+        results.extend((sql, per_row) for sql in sqls)
+    return results
+
+
 # ----------------------------
 # Execution result packing
 # ----------------------------
@@ -356,6 +397,19 @@ def main() -> int:
     parser.add_argument("--max_tables", type=int, default=12, help="Max tables for compact schema.")
     parser.add_argument("--max_new_tokens", type=int, default=128, help="Max tokens to generate for SQL.")
     parser.add_argument("--out", type=str, default="", help="Optional output JSONL path.")
+    parser.add_argument(
+        "--concurrent_exec",
+        action="store_true",
+        help="Run pred and (uncached) gold SQL at the same time on two pooled connections. "
+             "Faster, but both queries share the server, so their execution_time_s is not isolated.",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=1,
+        help="Generate up to N sentences of an entry per model.generate call (default: 1 = one per question). "
+             "With N > 1, gen_time_s is the batch time divided by its size.",
+    )
     args = parser.parse_args()
 
     dataset_path = Path(args.dataset)
@@ -393,32 +447,54 @@ def main() -> int:
     schema_tables = db.get_table_names(database=dataset_name)
 
     table_map = build_identifier_maps(db, dataset_name)
+    # Paraphrases of one entry usually fill to the same gold SQL: execute each
+    # distinct (successful) gold query once per run and reuse its result. Hits are
+    # not timed: they record execution_time_s None and {rdbms}_gold_cached True.
+    gold_cache: Dict[str, dict] = {}
+    # --concurrent_exec: pred runs on this worker while the main thread runs gold
+    exec_pool = ThreadPoolExecutor(max_workers=1) if args.concurrent_exec else None
     row_id = 0
     questions_processed = 0
 
-    with out_path.open("w", encoding="utf-8") as f:
+    # Binary + 1 MiB buffer: orjson already returns UTF-8 bytes, and fewer write() calls
+    with out_path.open("wb", buffering=1 << 20) as f:
         for entry in data:
             query_split = get_query_split(entry)
             sql_variants = get_sql_variants(entry)
             gold_sql_first = sql_variants[0] if sql_variants else ""
 
-            for sentence in iter_sentences(entry):
-                if args.limit > 0 and questions_processed >= args.limit:
-                    break
+            sentences = list(iter_sentences(entry))
+            if args.limit > 0:
+                sentences = sentences[:max(0, args.limit - questions_processed)]
 
+            # Prompt inputs for every sentence first, so generation can be batched per entry
+            prepared = []
+            for sentence in sentences:
                 question_text = get_sentence_text(sentence)
                 question_vars = get_sentence_variables(sentence)
                 question_text_filled = fill_question_text(question_text, question_vars)
 
-                question_split = get_question_split(sentence)
-                difficulty = get_difficulty(entry, sentence)
-
                 # Compact schema for prompt
                 schema_compact = db.get_compact_schema(
                     database=dataset_name,
                     question=question_text_filled,
                     max_tables=args.max_tables,
                 )
+                prepared.append((sentence, question_text, question_vars, question_text_filled, schema_compact))
+
+            # Generate SQL (time only generation)
+            generations = generate_for_entry(
+                agent,
+                [(schema_compact, question) for *_, question, schema_compact in prepared],
+                args.max_new_tokens,
+                args.batch_size,
+            )
+
+            for prep, (pred_sql_raw, gen_time_s) in zip(prepared, generations):
+                sentence, question_text, question_vars, question_text_filled, schema_compact = prep
+                question_split = get_question_split(sentence)
+                difficulty = get_difficulty(entry, sentence)
+
                 schema_num_tables, schema_num_columns = parse_schema_counts(schema_compact)
 
                 # Exact prompt tokens as actually fed into GPT-2 (includes truncation)
@@ -430,24 +506,25 @@ def main() -> int:
                 gold_sql_exec = fill_gold_sql(entry, sentence)
                 gold_sql_exec = normalize_table_case(gold_sql_exec, table_map)
 
-                # Generate SQL (time only generation)
-                t0 = time.time()
-                pred_sql_raw = agent.generate_sql(
-                    schema=schema_compact,
-                    question=question_text_filled,
-                    max_new_tokens=args.max_new_tokens,
-                )
-                gen_time_s = time.time() - t0
-
                 # Normalize prediction (table casing etc.)
                 pred_sql = normalize_pred_sql(pred_sql_raw, schema_tables)
                 pred_sql = normalize_table_case(pred_sql, table_map)
                 pred_sql, pred_repairs = repair_pred_table_names(pred_sql, schema_tables)
 
-                # Execute predicted + gold
-                db.switch_database(dataset_name)
-                pred_res = db.execute_query(pred_sql)
-                gold_res = db.execute_query(gold_sql_exec)
+                # Execute predicted + gold (db already switched to dataset_name above)
+                gold_res = gold_cache.get(gold_sql_exec)
+                gold_cached = gold_res is not None
+                if gold_res is None and exec_pool is not None:
+                    # execute_query checks out its own pooled connection per call
+                    pred_future = exec_pool.submit(db.execute_query, pred_sql)
+                    gold_res = db.execute_query(gold_sql_exec)
+                    pred_res = pred_future.result()
+                else:
+                    pred_res = db.execute_query(pred_sql)
+                    if gold_res is None:
+                        gold_res = db.execute_query(gold_sql_exec)
+                if not gold_cached and gold_res.get("success"):
+                    gold_cache[gold_sql_exec] = {**gold_res, "execution_time": None}
 
                 match = pred_vs_gold_match(pred_res, gold_res)
 
@@ -485,13 +562,14 @@ def main() -> int:
                 # Execution results (namespaced)
                 record.update(pack_exec_fields(f"{rdbms}_pred", pred_res))
                 record.update(pack_exec_fields(f"{rdbms}_gold", gold_res))
+                record[f"{rdbms}_gold_cached"] = gold_cached
 
                 # Execution comparison
                 record[f"{rdbms}_pred_vs_gold_match"] = bool(match)
 
                 record["pred_repairs"] = pred_repairs
 
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
 
                 # Console line
                 pred_ok = "OK" if pred_res and pred_res.get("success") else "FAIL"
@@ -509,6 +587,8 @@ def main() -> int:
             if args.limit > 0 and questions_processed >= args.limit:
                 break
 
+    if exec_pool is not None:
+        exec_pool.shutdown()
     db.close()
 
     print("\n" + "=" * 80)
@@ -5,9 +5,12 @@ Download and analyze text2sql datasets (robust + reproducible)
 
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+import orjson
+import pandas as pd
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -43,6 +46,9 @@ Unused datasets:
     },
 '''
 
+# Concurrent downloads (all datasets come from the same host)
+MAX_WORKERS = 4
+
 
 def make_session() -> requests.Session:
     """Requests session with retries for flaky networks."""
@@ -54,15 +60,19 @@ def make_session() -> requests.Session:
         allowed_methods=("GET",),
         raise_on_status=False,
     )
-    adapter = HTTPAdapter(max_retries=retries)
+    # Keep-alive pool sized for MAX_WORKERS parallel downloads
+    adapter = HTTPAdapter(
+        max_retries=retries,
+        pool_connections=MAX_WORKERS,
+        pool_maxsize=MAX_WORKERS,
+    )
     session.mount("https://", adapter)
     session.headers.update({"User-Agent": "adis-llmsql3-dataset-downloader/1.0"})
     return session
 
 
 def load_json(path: Path) -> Any:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return orjson.loads(path.read_bytes())  # parses UTF-8 bytes directly
 
 
 def save_json(path: Path, obj: Any) -> None:
@@ -77,15 +87,33 @@ def analyze_dataset(data: List[Dict[str, Any]], name: str) -> Dict[str, Any]:
         return {"name": name, "total": 0, "sql_key": None, "complexity": {}}
 
     sample = data[0]
+    sql_key = "sql" if "sql" in sample else None
 
     dist = {"simple": 0, "medium": 0, "complex": 0}
-    for item in data:
-            sql = item.get("sql", "")
+    if sql_key:
+        # First SQL variant per item (as in fill_gold_sql); counts via pandas str ops
+        sqls = pd.Series(
+            [
+                str(sql[0] if sql else "") if isinstance(sql, list) else str(sql)
+                for sql in (item.get(sql_key, "") for item in data)
+            ]
+        ).str.upper()
+        # whole-word counts, same rule as jsonl_to_csv_metrics._infer_sql_complexity
+        joins = sqls.str.count(r"\bJOIN\b").to_numpy()
+        subs = sqls.str.count(r"\bSELECT\b").to_numpy() - 1
+
+        simple = (joins == 0) & (subs <= 0)
+        medium = (joins <= 2) & (subs <= 1) & ~simple
+        dist["simple"] = int(simple.sum())
+        dist["medium"] = int(medium.sum())
+        dist["complex"] = len(data) - dist["simple"] - dist["medium"]
 
     return {
         "name": name,
         "total": len(data),
         "keys": list(sample.keys()),
+        "sql_key": sql_key,
+        "complexity": dist,
     }
 
 
@@ -95,8 +123,14 @@ def download_dataset(
     url: str,
     out_dir: Path,
     force: bool = False,
+    pretty: bool = False,
 ) -> Tuple[Optional[List[Dict[str, Any]]], Path, str]:
-    """Download dataset from URL unless cached."""
+    """
+    Download dataset from URL unless cached.
+
+    The response body is already JSON, so it is written to disk as-is;
+    pretty=True re-serializes it with indent=2 instead (readable diffs).
+    """
     
     out_path = out_dir / f"{name}.json"
     if out_path.exists() and not force:
@@ -105,8 +139,13 @@ def download_dataset(
     resp = session.get(url, timeout=60)
     resp.raise_for_status()
 
-    data = resp.json()
-    save_json(out_path, data)
+    body = resp.content
+    data = orjson.loads(body)  # validates before anything is written
+    if pretty:
+        save_json(out_path, data)
+    else:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_bytes(body)
     return data, out_path, "downloaded"
 
 
@@ -124,6 +163,15 @@ def main() -> int:
         "datasets": [],
     }
 
+    # Download in parallel; report in DATASETS order so output/manifest are stable
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {
+            name: pool.submit(
+                download_dataset, session, name, info["url"], output_dir, force=False
+            )
+            for name, info in DATASETS.items()
+        }
+
     ok = 0
     for name, info in DATASETS.items():
         print(f"\n{'='*60}")
@@ -132,13 +180,13 @@ def main() -> int:
         print("=" * 60)
 
         try:
-            data, path, mode = download_dataset(
-                session, name, info["url"], output_dir, force=False
-            )
+            data, path, mode = futures[name].result()
             analysis = analyze_dataset(data or [], name)
 
             print(f"📁 {mode.upper()}: {path}")
             print(f"📊 Total examples: {analysis['total']}")
+            if analysis.get("complexity"):
+                print(f"🧮 Complexity: {analysis['complexity']}")
             
             manifest["datasets"].append(
                 {
@@ -374,12 +374,12 @@ def main() -> int:
             # Decide whether to import
             min_tables = EXPECTED_TABLES.get(dataset, 1)
 
-            already = False
-            if not args.reset_db:
-                already = is_already_imported(db_type, creds, dataset, min_tables=min_tables)
+            # ensure_db has just created the DB if it was missing, so a single
+            # table count (one docker exec) decides; after a reset it is empty.
+            tc = 0 if args.reset_db else table_count(db_type, creds, dataset)
+            already = tc >= min_tables
 
             if already and not args.force_import:
-                tc = table_count(db_type, creds, dataset)
                 print(f"⏭️  Skipping import: {db_type}:{dataset} already populated (tables={tc} >= {min_tables}).")
             else:
                 print(f"📥 Importing {sql_path.name} into {db_type}:{dataset} ...")
@@ -7,10 +7,15 @@ SQL utilities for Text2SQL evaluation.
 
 """
 
+import decimal
 import re
+from functools import lru_cache
 from typing import Any, Dict, List, Tuple
 from difflib import SequenceMatcher
 
+import numpy as np
+import pandas as pd
+
 _QUOTED = re.compile(r"('(?:''|[^'])*'|\"(?:\"\"|[^\"])*\")")
 
 # Capture a table identifier right after FROM/JOIN/UPDATE/INTO/DELETE FROM
@@ -30,32 +35,46 @@ _TABLE_POS = re.compile(
     re.IGNORECASE | re.VERBOSE,
 )
 
+@lru_cache(maxsize=1024)
+def whole_token_pattern(keys: Tuple[str, ...]) -> "re.Pattern[str]":
+    """
+    One regex matching any of `keys` as a whole token (not surrounded by
+    [A-Za-z0-9_]), longest first so var1 never wins over var10.
+    Cached per key tuple: sentences of a dataset share few variable sets.
+    """
+    alts = "|".join(re.escape(k) for k in sorted(keys, key=len, reverse=True))
+    return re.compile(rf"(?<![A-Za-z0-9_])(?:{alts})(?![A-Za-z0-9_])")
+
 # Helper to compute similarity ratio
 def _ratio(a: str, b: str) -> float:
     return SequenceMatcher(None, a, b).ratio()
 
-def _best_table_match(token: str, tables: List[str], min_ratio: float = 0.86) -> Tuple[str, float, float]:
+def _best_table_match(token: str, tables: List[str], min_ratio: float = 0.86,
+                      tables_lower: List[str] | None = None) -> Tuple[str, float, float]:
     """
     Returns (best_table, best_ratio, second_best_ratio).
-    tables are actual DB table names.
+    tables are actual DB table names; tables_lower, if given, their .lower()
+    (computed once by the caller instead of on every lookup).
     """
     t = token.lower()
+    if tables_lower is None:
+        tables_lower = [real.lower() for real in tables]
 
     # Fast path: exact case-insensitive match
-    for real in tables:
-        if real.lower() == t:
+    for real, low in zip(tables, tables_lower):
+        if low == t:
             return real, 1.0, 0.0
 
     # Fast path: plural stripping
     if t.endswith("s"):
         singular = t[:-1]
-        for real in tables:
-            if real.lower() == singular:
+        for real, low in zip(tables, tables_lower):
+            if low == singular:
                 return real, 0.99, 0.0
 
     scored = []
-    for real in tables:
-        r = _ratio(t, real.lower())
+    for real, low in zip(tables, tables_lower):
+        r = _ratio(t, low)
         scored.append((r, real))
     scored.sort(reverse=True, key=lambda x: x[0])
 
@@ -79,13 +98,15 @@ def repair_pred_table_names(sql: str, actual_tables: List[str], min_ratio: float
 
     parts = _QUOTED.split(sql)
     changes = []
+    tables_lower = [t.lower() for t in actual_tables]
 
     for i in range(0, len(parts), 2):  # outside quotes only
         chunk = parts[i]
 
         def repl(m):
             q1, tok, q2 = m.group(1), m.group(2), m.group(3)
-            best, best_r, second_r = _best_table_match(tok, actual_tables, min_ratio=min_ratio)
+            best, best_r, second_r = _best_table_match(tok, actual_tables, min_ratio=min_ratio,
+                                                       tables_lower=tables_lower)
 
             # Ambiguity guard: best must beat second best by a margin
             if best.lower() != tok.lower():
@@ -139,21 +160,18 @@ def fill_gold_sql(entry: dict, sentence: dict) -> str:
         if name and name not in replacements:
             replacements[name] = example
 
-    if not replacements:
+    # Replace whole identifier token occurrences only, all names in one pass.
+    # This matches placeholders surrounded by punctuation/quotes/spaces safely.
+    # Names that are not even substrings of the SQL are dropped before any regex work.
+    values = {
+        str(name): str(value)
+        for name, value in replacements.items()
+        if value is not None and str(name) in sql
+    }
+    if not values:
         return sql
 
-    # Replace longer names first to avoid var1 matching inside var10
-    for name in sorted(replacements.keys(), key=len, reverse=True):
-        value = replacements[name]
-        if value is None:
-            continue
-
-        # Replace whole identifier token occurrences only.
-        # This matches placeholders surrounded by punctuation/quotes/spaces safely.
-        pattern = re.compile(rf"(?<![A-Za-z0-9_]){re.escape(str(name))}(?![A-Za-z0-9_])")
-        sql = pattern.sub(str(value), sql)
-
-    return sql
+    return whole_token_pattern(tuple(values)).sub(lambda m: values[m.group(0)], sql)
 
 
 
@@ -178,13 +196,15 @@ def normalize_pred_sql(pred_sql: str, schema_tables: list[str]) -> str:
     return normalized.strip()
 
 
-def compare_results(result1, result2) -> bool:
+def compare_results(result1, result2, use_arrow: bool = False) -> bool:
     """
     Compare two SQL query results represented as pandas DataFrames.
 
     - Ignores row order
     - Requires same columns
     - Treats NaN / NULL consistently
+    - use_arrow: hash all-string object columns as string[pyarrow]
+      (contiguous buffers instead of Python str objects; needs pyarrow)
     
     Returns:
         bool: True if results match, False otherwise
@@ -209,14 +229,83 @@ def compare_results(result1, result2) -> bool:
         df1 = df1.fillna("__NULL__")
         df2 = df2.fillna("__NULL__")
 
-        # Sort rows
+        if use_arrow:
+            df1 = _to_arrow_strings(df1)
+            df2 = _to_arrow_strings(df2)
+
+        # .equals() requires identical dtypes, so reject mismatches up front
+        if not df1.dtypes.equals(df2.dtypes):
+            return False
+
+        # Order-insensitive multiset compare on 64-bit row hashes: sorting two int64
+        # arrays instead of both frames by every column. Only valid when equal hashes
+        # mean equal values, which _hash_ready checks per column.
+        ready = _hash_ready(df1, df2)
+        if ready is not None:
+            try:
+                h1 = pd.util.hash_pandas_object(ready[0], index=False).to_numpy()
+                h2 = pd.util.hash_pandas_object(ready[1], index=False).to_numpy()
+            except TypeError:
+                pass  # unhashable cell values: fall back to sort + equals
+            else:
+                return bool(np.array_equal(np.sort(h1), np.sort(h2)))
+
         df1 = df1.sort_values(by=cols).reset_index(drop=True)
         df2 = df2.sort_values(by=cols).reset_index(drop=True)
-
         return df1.equals(df2)
     except Exception:
         return False
 
+# Object columns whose cells hash (via str()) equal exactly when they compare equal
+_HASH_EXACT_KINDS = frozenset({"string", "integer", "boolean", "empty"})
+# Wide enough for any MySQL/MariaDB DECIMAL (max 65 digits), so normalize() never rounds
+_DECIMAL_CTX = decimal.Context(prec=100)
+
+def _decimal_key(d):
+    """Canonical str of a Decimal: Decimal('1.0') / Decimal('1.00') -> '1', -0 -> '0'"""
+    return str(d.normalize(_DECIMAL_CTX)) if d else "0"
+
+def _hash_ready(df1, df2):
+    """
+    (df1, df2) prepared for row hashing, or None when a column could hold values that
+    compare equal but hash apart (mixed types, NULL-filled numbers, floats as objects).
+    Float columns get -0.0 folded into 0.0; DECIMAL columns (pymysql returns Decimal)
+    are hashed by their canonical string. Copies only if a column needs rewriting.
+    """
+    out1, out2 = df1, df2
+    for i in range(df1.shape[1]):
+        col1, col2 = df1.iloc[:, i], df2.iloc[:, i]
+        if pd.api.types.is_float_dtype(col1.dtype):
+            col1, col2 = col1 + 0.0, col2 + 0.0
+        elif col1.dtype == object:
+            kind = pd.api.types.infer_dtype(col1, skipna=False)
+            if kind != pd.api.types.infer_dtype(col2, skipna=False):
+                return None
+            if kind in _HASH_EXACT_KINDS:
+                continue
+            if kind != "decimal":
+                return None
+            col1, col2 = col1.map(_decimal_key), col2.map(_decimal_key)
+        else:
+            continue
+
+        if out1 is df1:
+            out1, out2 = df1.copy(), df2.copy()
+        out1.isetitem(i, col1)
+        out2.isetitem(i, col2)
+    return out1, out2
+
+def _to_arrow_strings(df):
+    """Cast object columns holding only str values to string[pyarrow] (no-op without pyarrow)"""
+    for c in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[c], skipna=False) != "string":
+            continue
+        try:
+            df[c] = df[c].astype("string[pyarrow]")
+        except ImportError:
+            return df
+    return df
+
 def compare_db_results(mysql_result, mariadb_result):
     """
     Compare results from MySQL and MariaDB